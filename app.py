@@ -3,7 +3,6 @@ from dotenv import load_dotenv
 import os
 load_dotenv()
 import secrets
-import mysql.connector
 from flask_mail import Mail
 from itsdangerous import URLSafeTimedSerializer
 from registration.registration import registration_app
@@ -21,6 +20,15 @@ from seller.seller_account import seller_account_app
 from buyer.buyer_account import buyer_account_app
 from buyer.buyer_payment_options import buyer_payment_options_app
 from seller.dashboard import dashboard_app
+from database.db import init_db
+from services.assets import init_assets
+from services.fragments import init_fragments
+from services.images import init_images
+from services.logging_config import configure_logging
+from services.suggestions import init_suggestions
+
+# Leveled, queued logging for every module (see services/logging_config.py)
+configure_logging()
 
 app = Flask(__name__)
 app.secret_key = secrets.token_hex(16)
@@ -28,26 +36,11 @@ app.secret_key = secrets.token_hex(16)
 # URL serializer for generating reset tokens
 s = URLSafeTimedSerializer(app.secret_key)
 
+# Fingerprinted static URLs cached for a year; no-store only on signed-in pages
+init_assets(app)
 
-@app.after_request
-def add_no_cache_headers(response):
-    response.headers['Cache-Control'] = 'no-store, no-cache, must-revalidate, post-check=0, pre-check=0, max-age=0'
-    response.headers['Pragma'] = 'no-cache'
-    response.headers['Expires'] = '-1'
-    return response
-
-# Database configuration
-db_config = {
-    "host": os.getenv("AIVEN_HOST"),
-    "port": int(os.getenv("AIVEN_PORT", 19441)),  # default port if not set
-    "user": os.getenv("AIVEN_USER"),
-    "password": os.getenv("AIVEN_PASSWORD"),
-    "database": os.getenv("AIVEN_DATABASE"),
-    "use_pure": True                          
-}
-
-def get_db_connection():
-    return mysql.connector.connect(**db_config)
+# Database connection pool (one per gunicorn worker, see database/db.py)
+init_db(app)
 
 # Mail configuration
 app.config['MAIL_SERVER'] = 'smtp.gmail.com'
@@ -73,6 +66,13 @@ os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 
+# product_image() for templates: srcset of the resized upload variants
+init_images(app)
+# render_product_cards() for templates: catalog cards from the fragment cache
+init_fragments(app)
+# product and category names for /suggest, loaded in the background from the first request
+init_suggestions(app)
+
 # Register blueprints (except reset_app for now)
 app.register_blueprint(registration_app)
 app.register_blueprint(login_app)
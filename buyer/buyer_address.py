@@ -1,21 +1,13 @@
 from flask import Blueprint, render_template, request, redirect, flash, session, url_for
 import mysql.connector
+from database.db import get_db_connection
+from database.ids import next_id
 from datetime import datetime
 import os
+import logging
 
 buyer_address_app = Blueprint('buyer_address', __name__)
-
-db_config = {
-    "host": os.getenv("AIVEN_HOST"),
-    "port": int(os.getenv("AIVEN_PORT", 19441)), 
-    "user": os.getenv("AIVEN_USER"),
-    "password": os.getenv("AIVEN_PASSWORD"),
-    "database": os.getenv("AIVEN_DATABASE"),
-    "use_pure": True                                  
-}
-
-def get_db_connection():
-    return mysql.connector.connect(**db_config)
+logger = logging.getLogger(__name__)
 
 @buyer_address_app.route('/buyer_address')
 def buyer_address():
@@ -84,12 +76,7 @@ def save_buyer_address():
         return redirect(url_for('buyer_address.buyer_address'))
 
 
-    cursor.execute("SELECT MAX(AddressID) FROM buyer_addresses")
-    last_id = cursor.fetchone()[0]
-    if last_id:
-        new_id = f"BA{int(last_id[2:]) + 1:04d}"
-    else:
-        new_id = "BA1000"
+    new_id = next_id('buyer_address')
     
     cursor.execute("SELECT COUNT(*) FROM buyer_addresses WHERE BuyerID=%s", (buyer_id,))
     has_addresses = cursor.fetchone()[0]
@@ -146,7 +133,7 @@ def delete_buyer_address(address_id):
             return redirect(url_for('buyer_address.buyer_address'))
 
     except Exception as e:
-        print(e)
+        logger.exception("Deleting address failed: %s", e)
         cursor.close()
         conn.close()
         flash("Something went wrong!")
@@ -179,7 +166,7 @@ def set_default_address():
         conn.commit()
     except Exception as e:
         conn.rollback()
-        print(e)
+        logger.exception("Setting default address failed: %s", e)
         return {"success": False, "error": str(e)}, 500
     finally:
         cursor.close()
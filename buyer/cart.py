@@ -1,25 +1,17 @@
 from flask import Blueprint, render_template, request, redirect, flash, session, url_for, jsonify
 import mysql.connector
+from database.db import get_db_connection
+from buyer.checkout import place_order
+from services.inventory import InsufficientStock
 import json
 from decimal import Decimal
-from datetime import datetime
 from dotenv import load_dotenv
 import os
+import logging
 
 load_dotenv()
 cart_app = Blueprint('cart', __name__)
-
-db_config = {
-    "host": os.getenv("AIVEN_HOST"),
-    "port": int(os.getenv("AIVEN_PORT", 19441)), 
-    "user": os.getenv("AIVEN_USER"),
-    "password": os.getenv("AIVEN_PASSWORD"),
-    "database": os.getenv("AIVEN_DATABASE"),
-    "use_pure": True                            
-}
-
-def get_db_connection():
-    return mysql.connector.connect(**db_config)
+logger = logging.getLogger(__name__)
 
 def fetch_cart_items_for_buyer(user_id):
     conn = get_db_connection()
@@ -40,6 +32,23 @@ def fetch_cart_items_for_buyer(user_id):
 
     return cart_items
 
+def fetch_variation_names(variation_ids):
+    if not variation_ids:
+        return {}
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    placeholders = ', '.join(['%s'] * len(variation_ids))
+    cursor.execute(f"""
+        SELECT pv.VariationID, p.Product_Name, pv.Unit
+        FROM product_variation pv
+        JOIN product p ON p.ProductID = pv.ProductID
+        WHERE pv.VariationID IN ({placeholders})
+    """, tuple(variation_ids))
+    names = {variation_id: f"{name} ({unit})" for variation_id, name, unit in cursor.fetchall()}
+    cursor.close()
+    conn.close()
+    return names
+
 def fetch_selected_items_details(selected_items):
     conn = get_db_connection()
     cursor = conn.cursor()
@@ -141,116 +150,6 @@ def fetch_default_address(user_id):
     return default_address
 
 
-def generate_order_id_for_buyer():
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute(f"SELECT MAX(OrderID) FROM buyer_order")
-    latest_order_id = cursor.fetchone()[0]
-
-    if latest_order_id is not None:
-        numeric_part = int(latest_order_id[2:])
-        new_numeric_part = numeric_part + 1
-    else:
-        new_numeric_part = 1000
-
-    order_id = f"OR{new_numeric_part}"
-    cursor.close()
-    conn.close()
-
-    return order_id
-
-def generate_order_id_for_seller():
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute(f"SELECT MAX(OrderID) FROM seller_order")
-    latest_order_id = cursor.fetchone()[0]
-
-    if latest_order_id is not None:
-        numeric_part = int(latest_order_id[2:])
-        new_numeric_part = numeric_part + 1
-    else:
-        new_numeric_part = 1000
-
-    order_id = f"OR{new_numeric_part}"
-    cursor.close()
-    conn.close()
-
-    return order_id
-
-def generate_order_date():
-    current_datetime = datetime.now()
-
-    order_date = current_datetime.strftime('%Y-%m-%d %H:%M:%S')
-
-    return order_date
-
-def insert_into_buyer_order(user_id, item_id, product_total, payment_optionsid, address_id):
-    conn = get_db_connection()
-    cursor = conn.cursor()
-
-    order_query = """
-        INSERT INTO buyer_order
-        (OrderID, BuyerID, ProductID, VariationID, Quantity, Total_Amount, Order_Date, Order_Status, Shipping_Date, Payment_OptionsID, AddressID)
-        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-    """
-
-    item_id = eval(item_id)
-    product_id = item_id[0]
-    variation_id = item_id[1]
-    quantity = get_quantity_from_cart(user_id, product_id, variation_id)
-    order_id = generate_order_id_for_buyer()
-    order_date = generate_order_date()
-
-    quantity_value = quantity[0]
-
-    order_values = (order_id, user_id, product_id, variation_id, quantity_value, product_total, order_date, 'waiting for payment', 'waiting for payment', payment_optionsid, address_id)
-
-    cursor.execute(order_query, order_values)
-    conn.commit()
-
-    cursor.close()
-    conn.close()
-
-def insert_into_seller_order(seller_id, user_id, item_id, product_total, payment_optionsid, address_id):
-    conn = get_db_connection()
-    cursor = conn.cursor()
-
-    order_query = """
-        INSERT INTO seller_order
-        (OrderID, SellerID, ProductID, VariationID, Quantity, Total_Amount, Order_Date, Order_Status, Shipping_Date, Payment_OptionsID, AddressID)
-        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-    """
-
-    item_id = eval(item_id)
-    product_id = item_id[0]
-    variation_id = item_id[1]
-    quantity = get_quantity_from_cart(user_id, product_id, variation_id)
-    order_id = generate_order_id_for_seller()
-    order_date = generate_order_date()
-
-    quantity_value = quantity[0]
-
-    order_values = (order_id, seller_id, product_id, variation_id, quantity_value, product_total, order_date, 'waiting for payment', 'waiting for payment', payment_optionsid, address_id)
-
-    cursor.execute(order_query, order_values)
-    conn.commit()
-
-    cursor.close()
-    conn.close()
-
-def get_quantity_from_cart(user_id, product_id, variation_id):
-    conn = get_db_connection()
-    cursor = conn.cursor()
-
-    query = "SELECT Cart_Quantity FROM cart WHERE BuyerID = %s AND ProductID = %s AND VariationID = %s"
-    cursor.execute(query, (user_id, product_id, variation_id))
-    quantity = cursor.fetchone()
-
-    cursor.close()
-    conn.close()
-
-    return quantity
-
 @cart_app.route('/get_addresses')
 def get_addresses():
     user_id = session.get("user_id")
@@ -408,7 +307,6 @@ def process_checkout():
     try:
         user_id = session.get('user_id')
         selected_items = request.form.getlist('selected_items')
-        product_totals = request.form.getlist('product_total[]')
         payment_options_json = request.form.get('payment_option_id')
         payment_options = json.loads(payment_options_json)
 
@@ -418,86 +316,25 @@ def process_checkout():
         if not address_id:
             return render_template('checkout.html', message="Please select an address before checking out.")
 
-        if selected_items and product_totals and payment_options:
-            for item_id, product_total in zip(selected_items, product_totals):
-                seller_id = eval(item_id)[8]
-                variation_id = eval(item_id)[1]
-                cart_quantity = eval(item_id)[5]
-                payment_option_id = payment_options.get(variation_id, '')
+        if selected_items and payment_options:
+            # "<ProductID>_<VariationID>", as on the cart page; prices and sellers come from the database
+            items = [tuple(item_id.split('_', 1)) for item_id in selected_items if '_' in item_id]
 
-                insert_into_buyer_order(user_id, item_id, product_total, payment_option_id, address_id)
+            try:
+                place_order(user_id, items, payment_options, address_id)
+            except InsufficientStock as e:
+                names = fetch_variation_names(list(e.shortages))
+                short = ", ".join(f"{names.get(variation_id, variation_id)}: only {left} left"
+                                  for variation_id, left in e.shortages.items())
+                return render_template('checkout.html', message=f"Not enough stock for {short}.")
 
-                insert_into_seller_order(seller_id, user_id, item_id, product_total, payment_option_id, address_id)
-
-                delete_item_from_cart(user_id, item_id)
-                decrease_quantity(variation_id, cart_quantity)
-
-            print("Data saved to the database.")
+            logger.debug("Checkout saved for buyer %s", user_id)
             return redirect('/homepage_buyer')
         else:
             message = "Please select items and payment option first."
             return render_template('checkout.html', message=message)
 
     except Exception as e:
-        print("Error:", str(e))
+        logger.exception("Checkout failed: %s", e)
         message = "An error occurred. Please try again."
         return render_template('checkout.html', message=message)
-
-def delete_item_from_cart(user_id, item_id):
-    conn = get_db_connection()
-    cursor = conn.cursor()
-
-    delete_query = "DELETE FROM cart WHERE ProductID = %s AND VariationID = %s AND BuyerID = %s"
-
-    try:
-        item_id = eval(item_id)
-        product_id = item_id[0]
-        variation_id = item_id[1]
-
-        cursor.execute(delete_query, (product_id, variation_id, user_id))
-        conn.commit()
-
-    except Exception as e:
-        print("Error deleting item from cart:", str(e))
-
-    finally:
-        cursor.close()
-        conn.close()
-
-def decrease_quantity(variation_id, cart_quantity):
-    conn = get_db_connection()
-    cursor = conn.cursor()
-
-    try:
-        # Get current quantity
-        quantity_query = "SELECT Quantity FROM product_variation WHERE VariationID = %s"
-        cursor.execute(quantity_query, (variation_id,))
-        current_quantity = cursor.fetchone()[0]
-
-        # Calculate new quantity
-        new_quantity = max(current_quantity - cart_quantity, 0)
-
-        # Update quantity
-        update_query = "UPDATE product_variation SET Quantity = %s WHERE VariationID = %s"
-        cursor.execute(update_query, (new_quantity, variation_id))
-
-        # Update status based on new quantity
-        if new_quantity == 0:
-            status = 'restock'
-        elif 0 < new_quantity < 10:
-            status = 'low-stock'
-        else:
-            status = 'in-stock'
-
-        status_query = "UPDATE product_variation SET Status = %s WHERE VariationID = %s"
-        cursor.execute(status_query, (status, variation_id))
-
-        conn.commit()
-
-    except Exception as e:
-        print("Error decreasing quantity:", str(e))
-
-    finally:
-        cursor.close()
-        conn.close()
-
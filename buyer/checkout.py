@@ -0,0 +1,114 @@
+from datetime import datetime
+from database.db import get_db_connection
+from database.ids import next_ids
+from services.catalog import refresh_summary_stock
+from services.inventory import reserve_stock
+
+
+class CheckoutError(Exception):
+    pass
+
+
+def generate_order_date():
+    return datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+
+def fetch_locked_cart_quantities(cursor, user_id, keys):
+    pairs = ', '.join(['(%s, %s)'] * len(keys))
+    cursor.execute(f"""
+        SELECT ProductID, VariationID, Cart_Quantity
+        FROM cart
+        WHERE BuyerID = %s AND (ProductID, VariationID) IN ({pairs})
+        FOR UPDATE
+    """, (user_id, *[value for key in keys for value in key]))
+    return {(row[0], row[1]): row[2] for row in cursor.fetchall()}
+
+
+def insert_orders(cursor, table, owner_column, rows):
+    placeholders = ', '.join(['(%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)'] * len(rows))
+    cursor.execute(f"""
+        INSERT INTO {table}
+        (OrderID, {owner_column}, ProductID, VariationID, Quantity, Unit_Price, Total_Amount, Order_Date, Order_Status, Shipping_Date, Payment_OptionsID, AddressID)
+        VALUES {placeholders}
+    """, [value for row in rows for value in row])
+
+
+def fetch_order_prices(cursor, variation_ids):
+    # VariationID -> (ProductID, SellerID, Price, Shipping_Fee)
+    in_list = ', '.join(['%s'] * len(variation_ids))
+    cursor.execute(f"""
+        SELECT pv.VariationID, p.ProductID, p.SellerID, pv.Price, p.Shipping_Fee
+        FROM product_variation pv
+        JOIN product p ON p.ProductID = pv.ProductID
+        WHERE pv.VariationID IN ({in_list})
+    """, tuple(variation_ids))
+    return {row[0]: row[1:] for row in cursor.fetchall()}
+
+
+def delete_cart_items(cursor, user_id, keys):
+    pairs = ', '.join(['(%s, %s)'] * len(keys))
+    cursor.execute(f"""
+        DELETE FROM cart
+        WHERE BuyerID = %s AND (ProductID, VariationID) IN ({pairs})
+    """, (user_id, *[value for key in keys for value in key]))
+
+
+def place_order(user_id, items, payment_options, address_id):
+    """Turn the selected cart lines into orders in a single transaction.
+
+    items is a list of (product_id, variation_id). Seller, price, shipping
+    fee and total are read in the same transaction, never taken from the
+    form. Either every line becomes a buyer/seller order with its stock
+    taken and its cart row removed, or nothing is written. Raises
+    InsufficientStock when a line asks for more than is left.
+    """
+    keys = list(dict.fromkeys(items))
+    if not keys:
+        raise CheckoutError("No items selected")
+
+    connection = get_db_connection()
+    cursor = connection.cursor()
+    try:
+        cart_quantities = fetch_locked_cart_quantities(cursor, user_id, keys)
+        missing = [key for key in keys if key not in cart_quantities]
+        if missing:
+            raise CheckoutError(f"Items no longer in cart: {missing}")
+
+        # the price at sale time, so later price edits don't rewrite sales history
+        prices = fetch_order_prices(cursor, list({variation_id for _, variation_id in keys}))
+        unknown = [key for key in keys if prices.get(key[1], (None,))[0] != key[0]]
+        if unknown:
+            raise CheckoutError(f"Items no longer for sale: {unknown}")
+
+        order_ids = next_ids('order', len(keys))
+        order_date = generate_order_date()
+
+        buyer_rows = []
+        seller_rows = []
+        stock_quantities = {}
+        for order_id, (product_id, variation_id) in zip(order_ids, keys):
+            quantity = cart_quantities[(product_id, variation_id)]
+            _, seller_id, unit_price, shipping_fee = prices[variation_id]
+            # same formula as the checkout page: price plus shipping, per unit
+            total_amount = (unit_price + shipping_fee) * quantity
+            payment_option_id = payment_options.get(variation_id, '')
+            common = (product_id, variation_id, quantity, unit_price, total_amount, order_date,
+                      'waiting for payment', 'waiting for payment', payment_option_id, address_id)
+            buyer_rows.append((order_id, user_id, *common))
+            seller_rows.append((order_id, seller_id, *common))
+            stock_quantities[variation_id] = stock_quantities.get(variation_id, 0) + quantity
+
+        insert_orders(cursor, 'buyer_order', 'BuyerID', buyer_rows)
+        insert_orders(cursor, 'seller_order', 'SellerID', seller_rows)
+        delete_cart_items(cursor, user_id, keys)
+        reserve_stock(cursor, stock_quantities)
+        refresh_summary_stock(cursor, [product_id for product_id, _ in keys])
+
+        connection.commit()
+        return order_ids
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
+        cursor.close()
+        connection.close()
@@ -1,69 +1,186 @@
-from flask import Blueprint, render_template, request, redirect, flash, session, url_for
+from flask import Blueprint, render_template, request, redirect, flash, session, url_for, jsonify
 import mysql.connector
+from database.db import get_db_connection
+from database.instrumentation import query_budget
+from services.catalog import catalog_etag, get_catalog_version
+from services.facets import get_facets
+from services.geo_index import geo_index
+from services.http_cache import is_fresh, not_modified, with_etag
+from services.orders import ORDER_CURSOR, cancel_order, get_orders, mark_order_delivered
+from services.pagination import NUMBER, TEXT, cursor_matches, decode_cursor, encode_cursor, get_page_size
+from services.logging_config import SAMPLED
+from services.reference import get_categories, get_category_id
+from services.search import find_matches, rank_matches, search_terms
+from services.suggestions import suggestion_index
 import bcrypt
 from dotenv import load_dotenv
 import os
-import math
+import logging
 
 load_dotenv()
 
 homepage_buyer_app = Blueprint('homepage_buyer', __name__)
+logger = logging.getLogger(__name__)
+
+CATALOG_PAGE_SIZE = 24
+CATALOG_SORTS = ('default', 'distance')
+# (-score, ProductID) of the last search result on a page
+SEARCH_CURSOR = (NUMBER, TEXT)
+
+def catalog_cursor(located, sort):
+    # (distance, ProductID) when nearest first, otherwise (ProductID,)
+    return (NUMBER, TEXT) if located and sort == 'distance' else (TEXT,)
+
+def get_buyer_location(cursor, buyer_id):
+    cursor.execute("""
+        SELECT Latitude, Longitude, Municipality, Province
+        FROM buyer_addresses
+        WHERE BuyerID = %s AND isDefault = 1
+    """, (buyer_id,))
+    address = cursor.fetchone()  # This will be None if no default address
+    if not address:
+        return None, None, None
+    return float(address["Latitude"]), float(address["Longitude"]), address
+
+def load_product_cards(cursor, product_ids):
+    if not product_ids:
+        return []
+    placeholders = ', '.join(['%s'] * len(product_ids))
+    cursor.execute(f"""
+        SELECT ProductID, Product_Name, Min_Price AS MinPrice, Max_Price AS MaxPrice,
+               ImageFileName, Municipality, Province
+        FROM product_summary
+        WHERE ProductID IN ({placeholders})
+    """, tuple(product_ids))
+    cards = {row["ProductID"]: row for row in cursor.fetchall()}
+    return [cards[product_id] for product_id in product_ids if product_id in cards]
+
+def get_catalog_page(cursor, buyer_lat, buyer_lon, range_km, category_id=None, sort='default', after=None,
+                     limit=CATALOG_PAGE_SIZE):
+    """Return one page of the catalog as (products, next_cursor, filtered_count).
+
+    With a default address only products within range_km are listed, in
+    ProductID order or nearest first (sort='distance'). Without one every
+    product is listed in ProductID order.
+    """
+    if not (buyer_lat and buyer_lon):
+        return get_unlocated_catalog_page(cursor, category_id, after, limit)
+
+    in_range = geo_index.products_within(buyer_lat, buyer_lon, range_km, category_id)
+    if sort == 'distance':
+        sort_key = lambda item: (item[1], item[0])
+    else:
+        sort_key = lambda item: (item[0],)
+    in_range.sort(key=sort_key)
 
-db_config = {
-    "host": os.getenv("AIVEN_HOST"),
-    "port": int(os.getenv("AIVEN_PORT", 19441)), 
-    "user": os.getenv("AIVEN_USER"),
-    "password": os.getenv("AIVEN_PASSWORD"),
-    "database": os.getenv("AIVEN_DATABASE"),
-    "use_pure": True                                 
-}
+    if after:
+        after = tuple(after)
+        in_range_after = [item for item in in_range if sort_key(item) > after]
+    else:
+        in_range_after = in_range
+    page = in_range_after[:limit]
+
+    product_data = load_product_cards(cursor, [product_id for product_id, _ in page])
+    distances = dict(page)
+    for p in product_data:
+        p["Distance"] = round(distances[p["ProductID"]], 2)
+        logger.debug("Product %s is %.2f km from buyer", p["ProductID"], p["Distance"], extra=SAMPLED)
+
+    next_cursor = None
+    if len(in_range_after) > limit:
+        next_cursor = encode_cursor(*sort_key(page[-1]))
+    return product_data, next_cursor, len(in_range)
+
+def get_unlocated_catalog_page(cursor, category_id=None, after=None, limit=CATALOG_PAGE_SIZE):
+    conditions, params = [], []
+    if after:
+        conditions.append("ProductID > %s")
+        params.append(after[0])
+    if category_id:
+        conditions.append("CategoryID = %s")
+        params.append(category_id)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+    cursor.execute(f"""
+        SELECT ProductID
+        FROM product_summary
+        {where}
+        ORDER BY ProductID
+        LIMIT %s
+    """, (*params, limit + 1))
+    product_ids = [row["ProductID"] for row in cursor.fetchall()]
+
+    next_cursor = None
+    if len(product_ids) > limit:
+        product_ids = product_ids[:limit]
+        next_cursor = encode_cursor(product_ids[-1])
+
+    count_query = "SELECT COUNT(*) AS count FROM product_summary"
+    count_params = ()
+    if category_id:
+        count_query += " WHERE CategoryID = %s"
+        count_params = (category_id,)
+    cursor.execute(count_query, count_params)
+    filtered_count = cursor.fetchone()["count"]
+
+    return load_product_cards(cursor, product_ids), next_cursor, filtered_count
+
+def get_search_page(cursor, terms, buyer_lat, buyer_lon, range_km, category_id=None, after=None,
+                    limit=CATALOG_PAGE_SIZE):
+    """Return one page of search results as (products, next_cursor, result_count), best match first.
+
+    With a default address only products within range_km are found, as on
+    the catalog.
+    """
+    distances = None
+    if buyer_lat and buyer_lon:
+        distances = dict(geo_index.products_within(buyer_lat, buyer_lon, range_km, category_id))
+    matches = find_matches(cursor, terms, category_id, list(distances) if distances is not None else None)
+    ranked = rank_matches(matches, distances, range_km)
+
+    sort_key = lambda item: (-item[0], item[1])
+    if after:
+        after = tuple(after)
+        ranked_after = [item for item in ranked if sort_key(item) > after]
+    else:
+        ranked_after = ranked
+    page = ranked_after[:limit]
+
+    product_data = load_product_cards(cursor, [product_id for _, product_id, _ in page])
+    page_distances = {product_id: distance for _, product_id, distance in page}
+    for p in product_data:
+        distance = page_distances[p["ProductID"]]
+        p["Distance"] = round(distance, 2) if distance is not None else None
+
+    next_cursor = None
+    if len(ranked_after) > limit:
+        next_cursor = encode_cursor(*sort_key(page[-1]))
+    return product_data, next_cursor, len(ranked)
 
-def get_db_connection():
-    try:
-        connection = mysql.connector.connect(**db_config)
-        return connection
-    except mysql.connector.Error as err:
-        print(f"Error: {err}")
-        return None
-
-def haversine(lat1, lon1, lat2, lon2):
-    R = 6371 
-    lat1, lon1, lat2, lon2 = map(math.radians, [lat1, lon1, lat2, lon2])
-    dlat = lat2 - lat1
-    dlon = lon2 - lon1
-    a = math.sin(dlat/2)**2 + math.cos(lat1)*math.cos(lat2)*math.sin(dlon/2)**2
-    c = 2 * math.asin(math.sqrt(a))
-    return R * c
-
-def count_total_products():
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    query = "SELECT COUNT(*) FROM product"
-    cursor.execute(query)
-    count = cursor.fetchone()[0]
-    cursor.close()
-    conn.close()
-    return count
 
 @homepage_buyer_app.route('/homepage_buyer', methods=['GET', 'POST'])
+@query_budget(8)
 def homepage_buyer():
     user_id = session.get("user_id")
     username = session.get("username")
     if not user_id:
         return redirect('/login') 
     product_data = []
+    next_cursor = None
     categories = []
     default_range_km = 25  # default slider value
     show_address_alert = False
-    total_products=count_total_products()
+    default_address = None
+    filtered_count = 0
+    total_products = 0
+    facets = None
+    etag = None
 
     try:
         with get_db_connection() as connection:
             cursor = connection.cursor(dictionary=True)
 
-            category_query = "SELECT CategoryID, Category_Name FROM product_category"
-            cursor.execute(category_query)
-            categories = cursor.fetchall()
+            categories = get_categories()
 
             buyer_id = session.get("user_id")
 
@@ -72,64 +189,35 @@ def homepage_buyer():
             if address_count == 0:
                 show_address_alert = True  
 
-            cursor.execute("""
-                SELECT Latitude, Longitude
-                FROM buyer_addresses
-                WHERE BuyerID = %s AND isDefault = 1
-            """, (buyer_id,))
-            buyer = cursor.fetchone()
-            buyer_lat = float(buyer["Latitude"]) if buyer else None
-            buyer_lon = float(buyer["Longitude"]) if buyer else None
-            print(f"Buyer coordinates: lat={buyer_lat}, lon={buyer_lon}")
-
-            cursor.execute("""
-                SELECT Municipality, Province
-                FROM buyer_addresses
-                WHERE BuyerID = %s AND isDefault = 1
-            """, (buyer_id,))
-            default_address = cursor.fetchone()  # This will be None if no default address
-
-            product_query = """
-            SELECT p.ProductID, p.Product_Name, MIN(pv.Price) as MinPrice, MAX(pv.Price) as MaxPrice,
-                   p.ImageFileName, sa.Municipality, sa.Province, sa.Latitude AS SellerLat, sa.Longitude AS SellerLon
-            FROM product p
-            JOIN product_variation pv ON p.ProductID = pv.ProductID
-            JOIN seller_addresses sa ON p.AddressID = sa.AddressID
-            GROUP BY p.ProductID, p.Product_Name, p.ImageFileName, sa.Municipality, sa.Province, sa.Latitude, sa.Longitude
-            """
-            cursor.execute(product_query)
-            all_products = cursor.fetchall()
-
-            if buyer_lat and buyer_lon:
-                for p in all_products:
-                    print(f"Product {p['ProductID']} coordinates: lat={p['SellerLat']}, lon={p['SellerLon']}")
-                    dist = haversine(
-                        buyer_lat, buyer_lon,
-                        float(p["SellerLat"]), float(p["SellerLon"])
-                    )
-                    print(f"Distance to product {p['ProductID']}: {dist} km")
-                    if dist <= default_range_km:
-                        p["Distance"] = round(dist, 2)
-                        product_data.append(p)
-            else:
-                # if no default address, show all products
-                product_data = all_products
+            buyer_lat, buyer_lon, default_address = get_buyer_location(cursor, buyer_id)
 
+            # nothing the page shows has changed since the browser's copy
+            version = get_catalog_version(cursor, include_stock=False)
+            etag = catalog_etag(version, buyer_id, username, show_address_alert, default_address, default_range_km)
+            if is_fresh(etag):
+                return not_modified(etag)
+
+            geo_index.catch_up(version)
+            total_products = get_facets(version)['total']
+            facets = get_facets(version, buyer_lat, buyer_lon, default_range_km)
+            product_data, next_cursor, filtered_count = get_catalog_page(cursor, buyer_lat, buyer_lon, default_range_km)
 
     except mysql.connector.Error as err:
-        print(f"Database error: {err}")
+        logger.error("Database error: %s", err)
+        etag = None
 
 
-    filtered_count = len(product_data)
-    return render_template(
+    body = render_template(
         'homepage_buyer.html',
         product_data=product_data,
         categories=categories,
         selected_km=default_range_km, 
         show_address_alert=show_address_alert, default_address=default_address,
         username=username,
-        total_products=total_products, filtered_count=filtered_count
+        total_products=total_products, filtered_count=filtered_count, facets=facets,
+        next_cursor=next_cursor
     )
+    return with_etag(body, etag) if etag else body
 
 @homepage_buyer_app.route('/logout', methods=['POST'])
 def logout():
@@ -138,195 +226,238 @@ def logout():
 
 
 @homepage_buyer_app.route('/filter', methods=['GET'])
+@query_budget(8)
 def filter_products():
     user_id = session.get("user_id")
     username = session.get("username")
     if not user_id:
         return redirect('/login') 
     product_data = []
+    next_cursor = None
+    categories = []
+    default_address = None
+    filtered_count = 0
     selected_km = int(request.args.get("range_km", 25))
     selected_category = request.args.get("category", "all")
-    total_products=count_total_products()
+    selected_sort = request.args.get("sort", "default")
+    if selected_sort not in CATALOG_SORTS:
+        selected_sort = "default"
+    total_products = 0
+    facets = None
+    etag = None
 
     try:
         with get_db_connection() as connection:
             cursor = connection.cursor(dictionary=True)
             # Get categories for sidebar
-            cursor.execute("SELECT CategoryID, Category_Name FROM product_category")
-            categories = cursor.fetchall()
+            categories = get_categories()
 
             # Get buyer default address
             buyer_id = session.get("user_id")
-            cursor.execute("""SELECT Latitude, Longitude FROM buyer_addresses WHERE BuyerID = %s AND isDefault = 1""", (buyer_id,))
-            buyer = cursor.fetchone()
-            buyer_lat = float(buyer["Latitude"]) if buyer else None
-            buyer_lon = float(buyer["Longitude"]) if buyer else None
-
-            cursor.execute("""
-                SELECT Municipality, Province
-                FROM buyer_addresses
-                WHERE BuyerID = %s AND isDefault = 1
-            """, (buyer_id,))
-            default_address = cursor.fetchone()  # This will be None if no default address
-
-            if selected_category.lower() == "all":
-                product_query = """SELECT p.ProductID, p.Product_Name, MIN(pv.Price) as MinPrice, MAX(pv.Price) as MaxPrice,
-                                   p.ImageFileName, sa.Municipality, sa.Province, sa.Latitude AS SellerLat, sa.Longitude AS SellerLon
-                                   FROM product p 
-                                   LEFT JOIN product_variation pv ON p.ProductID = pv.ProductID
-                                   JOIN seller_addresses sa ON p.AddressID = sa.AddressID
-                                   GROUP BY p.ProductID, p.Product_Name, p.ImageFileName, sa.Municipality, sa.Province, sa.Latitude, sa.Longitude"""
-                cursor.execute(product_query)
-            else:
-                cursor.execute("SELECT CategoryID FROM product_category WHERE Category_Name = %s", (selected_category,))
-                category_result = cursor.fetchone()
-                if not category_result:
+            buyer_lat, buyer_lon, default_address = get_buyer_location(cursor, buyer_id)
+
+            category_id = None
+            if selected_category.lower() != "all":
+                category_id = get_category_id(selected_category)
+                if not category_id:
                     return redirect(url_for('homepage_buyer.homepage_buyer'))
-                category_id = category_result["CategoryID"]
-                product_query = """SELECT p.ProductID, p.Product_Name, MIN(pv.Price) as MinPrice, MAX(pv.Price) as MaxPrice,
-                                   p.ImageFileName, sa.Municipality, sa.Province, sa.Latitude AS SellerLat, sa.Longitude AS SellerLon
-                                   FROM product p
-                                   LEFT JOIN product_variation pv ON p.ProductID = pv.ProductID
-                                   JOIN seller_addresses sa ON p.AddressID = sa.AddressID
-                                   WHERE p.CategoryID = %s
-                                   GROUP BY p.ProductID, p.Product_Name, p.ImageFileName, sa.Municipality, sa.Province, sa.Latitude, sa.Longitude"""
-                cursor.execute(product_query, (category_id,))
-
-            all_products = cursor.fetchall()
-            # Filter by distance
-            if buyer_lat and buyer_lon:
-                for p in all_products:
-                    dist = haversine(buyer_lat, buyer_lon, float(p["SellerLat"]), float(p["SellerLon"]))
-                    if dist <= selected_km:
-                        p["Distance"] = round(dist, 2)
-                        product_data.append(p)
-            else:
-                product_data = all_products
+
+            version = get_catalog_version(cursor, include_stock=False)
+            etag = catalog_etag(version, buyer_id, username, default_address, selected_km, category_id, selected_sort)
+            if is_fresh(etag):
+                return not_modified(etag)
+
+            geo_index.catch_up(version)
+            total_products = get_facets(version)['total']
+            facets = get_facets(version, buyer_lat, buyer_lon, selected_km)
+            product_data, next_cursor, filtered_count = get_catalog_page(cursor, buyer_lat, buyer_lon, selected_km,
+                                                                         category_id, selected_sort)
     except mysql.connector.Error as err:
-        print(f"Database error: {err}")
+        logger.error("Database error: %s", err)
+        etag = None
 
 
-    filtered_count = len(product_data)
-    return render_template('homepage_buyer.html', product_data=product_data, categories=categories,
+    body = render_template('homepage_buyer.html', product_data=product_data, categories=categories,
                            selected_km=selected_km, selected_category=selected_category.lower(), default_address=default_address,
-                           username=username,total_products=total_products, filtered_count = filtered_count)
+                           username=username,total_products=total_products, filtered_count = filtered_count,
+                           facets=facets, next_cursor=next_cursor, selected_sort=selected_sort)
+    return with_etag(body, etag) if etag else body
 
+@homepage_buyer_app.route('/products/more', methods=['GET'])
+@query_budget(6)
+def more_products():
+    user_id = session.get("user_id")
+    if not user_id:
+        return jsonify({"error": "Not logged in"}), 401
+    after = decode_cursor(request.args.get('after'))
+    if after is None:
+        return jsonify({"error": "Invalid cursor"}), 400
+    selected_km = int(request.args.get("range_km", 25))
+    selected_category = request.args.get("category", "all")
+    selected_sort = request.args.get("sort", "default")
 
-def get_categories ():
-    try:
-        with get_db_connection() as connection:
-            cursor = connection.cursor(dictionary=True)
-            category_query = "SELECT CategoryID, Category_Name FROM product_category"
-            cursor.execute(category_query)
-            categories_stat = cursor.fetchall()
-            return categories_stat
-       
-    except mysql.connector.Error as err:
-        print(f"Database error: {err}")
+    with get_db_connection() as connection:
+        cursor = connection.cursor(dictionary=True)
+        buyer_lat, buyer_lon, _ = get_buyer_location(cursor, user_id)
+        if not cursor_matches(after, *catalog_cursor(bool(buyer_lat and buyer_lon), selected_sort)):
+            return jsonify({"error": "Invalid cursor"}), 400
+
+        category_id = None
+        if selected_category.lower() != "all":
+            category_id = get_category_id(selected_category)
+            if not category_id:
+                return jsonify({"error": "Unknown category"}), 404
 
-def get_to_pay_orders_data(user_id, sort='recent'):
-    order_details = []
+        product_data, next_cursor, _ = get_catalog_page(cursor, buyer_lat, buyer_lon, selected_km, category_id,
+                                                        selected_sort, after=after,
+                                                        limit=get_page_size(request.args.get('limit'), CATALOG_PAGE_SIZE))
+
+    html = render_template('partials/product_cards.html', product_data=product_data)
+    return jsonify({"html": html, "next_cursor": next_cursor})
+
+
+@homepage_buyer_app.route('/search', methods=['GET'])
+@query_budget(8)
+def search_products():
+    user_id = session.get("user_id")
+    username = session.get("username")
+    if not user_id:
+        return redirect('/login')
+    search_query = request.args.get("q", "").strip()
+    selected_km = int(request.args.get("range_km", 25))
+    selected_category = request.args.get("category", "all")
+    terms = search_terms(search_query)
+    if not terms:
+        return redirect(url_for('homepage_buyer.filter_products', range_km=selected_km, category=selected_category))
+    product_data = []
+    next_cursor = None
+    categories = []
+    default_address = None
+    filtered_count = 0
+    total_products = 0
+    facets = None
+    etag = None
 
     try:
         with get_db_connection() as connection:
             cursor = connection.cursor(dictionary=True)
-
             categories = get_categories()
-           
-            if sort == 'old':
-                order_by = 'ASC'
-            else:
-                order_by = 'DESC'
-
-            query_orders = f"""
-            SELECT OrderID, ProductID, VariationID, Quantity, Total_Amount, Order_Date, Payment_OptionsID, Order_Date, AddressID
-            FROM buyer_order
-            WHERE Order_Status = 'waiting for payment' AND BuyerID = %s
-            ORDER BY Order_Date {order_by}
-            """
-            cursor.execute(query_orders, (user_id,))
-            orders = cursor.fetchall()
-           
-            for order in orders:
-                order_id = order['OrderID']
-                product_id = order['ProductID']
-                variation_id = order['VariationID']
-                quantity = order['Quantity']
-                order_date = order['Order_Date']
-                address_id = order.get('AddressID')
-                payment_optionsid = order.get('Payment_OptionsID')
-
-                query_product = """
-                SELECT Product_Name, ImageFileName, Shipping_Fee
-                FROM product
-                WHERE ProductID = %s
-                """
-                cursor.execute(query_product, (product_id,))
-                product_info = cursor.fetchone()
-
-                query_variation = """
-                SELECT Unit, Price
-                FROM product_variation
-                WHERE VariationID = %s
-                """
-                cursor.execute(query_variation, (variation_id,))
-                variation_info = cursor.fetchone()
-
-                buyer_address = ""
-                if address_id:
-                    cursor.execute("""
-                    SELECT Full_Name, Phone_Number, Street, Municipality, Province, Zip_Code
-                    FROM buyer_addresses
-                    WHERE AddressID = %s
-                    """, (address_id,))
-                    addr = cursor.fetchone()
-                    if addr:
-                        buyer_address = f"{addr['Full_Name']}, {addr['Phone_Number']}, {addr['Street']}, {addr['Municipality']}, {addr['Province']} {addr['Zip_Code']}"
-
-                payment_opt = ""
-                if payment_optionsid:
-                    cursor.execute("""
-                    SELECT Payment_Method, Account_Number
-                    FROM buyer_payment_options
-                    WHERE Payment_OptionsID = %s
-                    """, (payment_optionsid,))
-                    payment = cursor.fetchone()
-                    if payment:
-                        payment_opt = f"{payment['Payment_Method']}, {payment['Account_Number']}"
-
-                order_detail = {
-                    'ImageFileName': product_info['ImageFileName'],
-                    'Product_Name': product_info['Product_Name'],
-                    'Shipping_Fee': product_info['Shipping_Fee'],
-                    'Unit': variation_info['Unit'],
-                    'Quantity': order['Quantity'],
-                    'OrderID': order['OrderID'],
-                    'Price': variation_info['Price'],
-                    'Total_Amount': order['Total_Amount'],
-                    'Order_Date': order['Order_Date'],
-                    'Buyer_Address': buyer_address,
-                    'Payment_Option': payment_opt
-                }
-                order_details.append(order_detail)
-
-            print(sort)
-            print("ORDER BY:", order_by)
-            print("Final Query:", query_orders)
+            buyer_lat, buyer_lon, default_address = get_buyer_location(cursor, user_id)
+
+            category_id = None
+            if selected_category.lower() != "all":
+                category_id = get_category_id(selected_category)
+                if not category_id:
+                    return redirect(url_for('homepage_buyer.homepage_buyer'))
+
+            version = get_catalog_version(cursor, include_stock=False)
+            etag = catalog_etag(version, user_id, username, default_address, selected_km, category_id,
+                                terms)
+            if is_fresh(etag):
+                return not_modified(etag)
+
+            geo_index.catch_up(version)
+            total_products = get_facets(version)['total']
+            facets = get_facets(version, buyer_lat, buyer_lon, selected_km)
+            product_data, next_cursor, filtered_count = get_search_page(cursor, terms, buyer_lat, buyer_lon,
+                                                                        selected_km, category_id)
     except mysql.connector.Error as err:
-        print(f"Error: {err}")
+        logger.error("Database error: %s", err)
+        etag = None
+
+    body = render_template('homepage_buyer.html', product_data=product_data, categories=categories,
+                           selected_km=selected_km, selected_category=selected_category.lower(),
+                           default_address=default_address, username=username, total_products=total_products,
+                           filtered_count=filtered_count, facets=facets, next_cursor=next_cursor,
+                           search_query=search_query)
+    return with_etag(body, etag) if etag else body
+
+@homepage_buyer_app.route('/search/more', methods=['GET'])
+@query_budget(6)
+def more_search_results():
+    user_id = session.get("user_id")
+    if not user_id:
+        return jsonify({"error": "Not logged in"}), 401
+    after = decode_cursor(request.args.get('after'))
+    if not cursor_matches(after, *SEARCH_CURSOR):
+        return jsonify({"error": "Invalid cursor"}), 400
+    terms = search_terms(request.args.get("q"))
+    if not terms:
+        return jsonify({"error": "Missing search terms"}), 400
+    selected_km = int(request.args.get("range_km", 25))
+    selected_category = request.args.get("category", "all")
 
-    return order_details, categories
+    with get_db_connection() as connection:
+        cursor = connection.cursor(dictionary=True)
+        buyer_lat, buyer_lon, _ = get_buyer_location(cursor, user_id)
+
+        category_id = None
+        if selected_category.lower() != "all":
+            category_id = get_category_id(selected_category)
+            if not category_id:
+                return jsonify({"error": "Unknown category"}), 404
+
+        product_data, next_cursor, _ = get_search_page(cursor, terms, buyer_lat, buyer_lon, selected_km,
+                                                       category_id, after=after,
+                                                       limit=get_page_size(request.args.get('limit'), CATALOG_PAGE_SIZE))
+
+    html = render_template('partials/product_cards.html', product_data=product_data)
+    return jsonify({"html": html, "next_cursor": next_cursor})
+
+@homepage_buyer_app.route('/suggest', methods=['GET'])
+def suggest():
+    if not session.get("user_id"):
+        return jsonify({"error": "Not logged in"}), 401
+    # answered from this worker's in-memory index, without a query
+    return jsonify({"suggestions": suggestion_index.suggest(request.args.get("q", ""))})
+
+
+ORDER_STATUSES = {
+    'to_pay': 'waiting for payment',
+    'to_ship': 'pending',
+    'shipping': 'shipping',
+    'delivered': 'delivered',
+    'cancelled': 'cancelled'
+}
 
-@homepage_buyer_app.route('/to-pay-orders', methods=['POST','GET'])
-def to_pay_orders():
+def render_orders(order_type):
     user_id = session.get("user_id")
     if not user_id:
         return redirect('/login') 
     sort = request.args.get('sort', 'recent')
-    order_details, categories = get_to_pay_orders_data(user_id, sort)
 
-    order_type = 'to_pay'
-    return render_template('buyer_order.html', order_details=order_details, order_type=order_type, categories=categories)
+    order_details, next_cursor, categories = [], None, []
+    try:
+        order_details, next_cursor = get_orders(ORDER_STATUSES[order_type], buyer_id=user_id, sort=sort)
+        categories = get_categories()
+    except mysql.connector.Error as err:
+        logger.error("Database error: %s", err)
+
+    return render_template('buyer_order.html', order_details=order_details, order_type=order_type, categories=categories,
+                           next_cursor=next_cursor)
+
+@homepage_buyer_app.route('/orders/<order_type>/more', methods=['GET'])
+@query_budget(2)
+def more_orders(order_type):
+    user_id = session.get("user_id")
+    if not user_id:
+        return jsonify({"error": "Not logged in"}), 401
+    if order_type not in ORDER_STATUSES:
+        return jsonify({"error": "Unknown order type"}), 404
+    after = decode_cursor(request.args.get('after'))
+    if not cursor_matches(after, *ORDER_CURSOR):
+        return jsonify({"error": "Invalid cursor"}), 400
+
+    order_details, next_cursor = get_orders(ORDER_STATUSES[order_type], buyer_id=user_id,
+                                            sort=request.args.get('sort', 'recent'), after=after,
+                                            limit=get_page_size(request.args.get('limit')))
+    html = render_template('partials/buyer_order_cards.html', order_details=order_details, order_type=order_type)
+    return jsonify({"html": html, "next_cursor": next_cursor})
+
+@homepage_buyer_app.route('/to-pay-orders', methods=['POST','GET'])
+@query_budget(3)
+def to_pay_orders():
+    return render_orders('to_pay')
 
 @homepage_buyer_app.route('/pay-now/<order_id>', methods=['POST'])
 def pay_now(order_id):
@@ -334,8 +465,6 @@ def pay_now(order_id):
     if not user_id:
         return redirect('/login') 
 
-    order_details, categories = get_to_pay_orders_data(user_id)
-   
     try:
         with get_db_connection() as connection:
             cursor = connection.cursor()
@@ -359,204 +488,20 @@ def pay_now(order_id):
             connection.commit()
 
     except mysql.connector.Error as err:
-        print(f"Error: {err}")
+        logger.error("Database error: %s", err)
 
     # Redirect to the order page with a flag to refresh
-    return redirect(url_for('homepage_buyer.to_pay_orders', order_type='to_pay', order_details=order_details, categories=categories, refresh_page='true'))
+    return redirect(url_for('homepage_buyer.to_pay_orders', order_type='to_pay', refresh_page='true'))
 
 @homepage_buyer_app.route('/to-ship-orders', methods=['POST','GET'])
+@query_budget(3)
 def to_ship_orders():
-    user_id = session.get("user_id")
-    if not user_id:
-        return redirect('/login') 
-    order_details = []  
-
-    sort = request.args.get('sort', 'recent')
-   
-    try:
-        with get_db_connection() as connection:
-            cursor = connection.cursor(dictionary=True)
-            categories=get_categories()
-
-            order_by = 'ASC' if sort == 'old' else 'DESC'
-
-            query_orders = f"""
-            SELECT OrderID, ProductID, VariationID, Quantity, Total_Amount, Payment_OptionsID, Order_Date, AddressID
-            FROM buyer_order
-            WHERE Order_Status = 'pending' AND BuyerID = %s
-            ORDER BY Order_Date {order_by}
-            """
-            cursor.execute(query_orders, (user_id,))
-            orders = cursor.fetchall()
-            print(orders)
-            for order in orders:
-                product_id = order['ProductID']
-                variation_id = order['VariationID']
-                order_date = order['Order_Date']
-                address_id = order.get('AddressID')
-                payment_optionsid = order.get('Payment_OptionsID')
-
-                query_product = """
-                SELECT Product_Name, ImageFileName, Shipping_Fee
-                FROM product
-                WHERE ProductID = %s
-                """
-                cursor.execute(query_product, (product_id,))
-                product_info = cursor.fetchone()
-               
-                print(product_info)
-
-                query_variation = """
-                SELECT Unit, Price
-                FROM product_variation
-                WHERE VariationID = %s
-                """
-                cursor.execute(query_variation, (variation_id,))
-                variation_info = cursor.fetchone()
-
-                buyer_address = ""
-                if address_id:
-                    cursor.execute("""
-                    SELECT Full_Name, Phone_Number, Street, Municipality, Province, Zip_Code
-                    FROM buyer_addresses
-                    WHERE AddressID = %s
-                    """, (address_id,))
-                    addr = cursor.fetchone()
-                    if addr:
-                        buyer_address = f"{addr['Full_Name']}, {addr['Phone_Number']}, {addr['Street']}, {addr['Municipality']}, {addr['Province']} {addr['Zip_Code']}"
-         
-                payment_opt = ""
-                if payment_optionsid:
-                    cursor.execute("""
-                    SELECT Payment_Method, Account_Number
-                    FROM buyer_payment_options
-                    WHERE Payment_OptionsID = %s
-                    """, (payment_optionsid,))
-                    payment = cursor.fetchone()
-                    if payment:
-                        payment_opt = f"{payment['Payment_Method']}, {payment['Account_Number']}"
-
-                order_detail = {
-                    'ImageFileName': product_info['ImageFileName'],
-                    'Product_Name': product_info['Product_Name'],
-                    'Shipping_Fee': product_info['Shipping_Fee'],
-                    'Quantity': order['Quantity'],
-                    'Unit': variation_info['Unit'],
-                    'Price': variation_info['Price'],
-                    'Total_Amount': order['Total_Amount'],
-                    'OrderID': order['OrderID'],
-                    'Order_Date': order['Order_Date'],
-                    'Buyer_Address': buyer_address,
-                    'Payment_Option': payment_opt
-                }
-                order_details.append(order_detail)
-
-    except mysql.connector.Error as err:
-        print(f"Error: {err}")
-       
-    order_type = 'to_ship'
-    return render_template('buyer_order.html', order_details=order_details, order_type=order_type, categories=categories)
-
-def get_shipping_orders_data(user_id, sort='recent'):
-    order_details = []
-    try:
-        with get_db_connection() as connection:
-            cursor = connection.cursor(dictionary=True)
-
-            if sort == 'old':
-                order_by = 'ASC'
-            else:
-                order_by = 'DESC'
-
-            categories = get_categories()
-
-            query_orders = f"""
-            SELECT OrderID, ProductID, VariationID, Quantity, Total_Amount, Order_Date, Payment_OptionsID, Shipping_Date, Order_Date, AddressID
-            FROM buyer_order
-            WHERE Order_Status = 'shipping' AND BuyerID = %s
-            ORDER BY Order_Date {order_by}
-            """
-            cursor.execute(query_orders, (user_id,))
-            orders = cursor.fetchall()
-           
-            for order in orders:
-                order_id = order['OrderID']
-                product_id = order['ProductID']
-                variation_id = order['VariationID']
-                quantity = order['Quantity']
-                order_date = order['Order_Date']
-                address_id = order.get('AddressID')
-                payment_optionsid = order.get('Payment_OptionsID')
-
-                query_product = """
-                SELECT Product_Name, ImageFileName, Shipping_Fee
-                FROM product
-                WHERE ProductID = %s
-                """
-                cursor.execute(query_product, (product_id,))
-                product_info = cursor.fetchone()
-
-                query_variation = """
-                SELECT Unit, Price
-                FROM product_variation
-                WHERE VariationID = %s
-                """
-                cursor.execute(query_variation, (variation_id,))
-                variation_info = cursor.fetchone()
-
-                buyer_address = ""
-                if address_id:
-                    cursor.execute("""
-                    SELECT Full_Name, Phone_Number, Street, Municipality, Province, Zip_Code
-                    FROM buyer_addresses
-                    WHERE AddressID = %s
-                    """, (address_id,))
-                    addr = cursor.fetchone()
-                    if addr:
-                        buyer_address = f"{addr['Full_Name']}, {addr['Phone_Number']}, {addr['Street']}, {addr['Municipality']}, {addr['Province']} {addr['Zip_Code']}"
-
-                payment_opt = ""
-                if payment_optionsid:
-                    cursor.execute("""
-                    SELECT Payment_Method, Account_Number
-                    FROM buyer_payment_options
-                    WHERE Payment_OptionsID = %s
-                    """, (payment_optionsid,))
-                    payment = cursor.fetchone()
-                    if payment:
-                        payment_opt = f"{payment['Payment_Method']}, {payment['Account_Number']}"
-
-                order_detail = {
-                    'ImageFileName': product_info['ImageFileName'],
-                    'Product_Name': product_info['Product_Name'],
-                    'Shipping_Fee': product_info['Shipping_Fee'],
-                    'Unit': variation_info['Unit'],
-                    'Quantity': order['Quantity'],
-                    'OrderID': order['OrderID'],
-                    'Price': variation_info['Price'],
-                    'Total_Amount': order['Total_Amount'],
-                    'Shipping_Date': order['Shipping_Date'],
-                    'Order_Date': order['Order_Date'],
-                    'Buyer_Address': buyer_address,
-                    'Payment_Option': payment_opt
-                }
-                order_details.append(order_detail)
-
-    except mysql.connector.Error as err:
-        print(f"Error: {err}")
-       
-    return order_details, categories
+    return render_orders('to_ship')
 
 @homepage_buyer_app.route('/shipping-orders', methods=['POST','GET'])
+@query_budget(3)
 def shipping_orders():
-    user_id = session.get("user_id")
-    if not user_id:
-        return redirect('/login') 
-    sort = request.args.get('sort', 'recent')
-    order_details, categories = get_shipping_orders_data(user_id, sort)
-
-    order_type = 'shipping'
-    return render_template('buyer_order.html', order_details=order_details, order_type=order_type, categories=categories)
+    return render_orders('shipping')
 
 @homepage_buyer_app.route('/order-received/<order_id>', methods=['POST', 'GET'])
 def order_received(order_id):
@@ -564,371 +509,33 @@ def order_received(order_id):
     if not user_id:
         return redirect('/login') 
    
-    order_details, categories = get_shipping_orders_data(user_id)
     try:
-        with get_db_connection() as connection:
-            cursor = connection.cursor()
-
-            update_query = """
-            UPDATE buyer_order
-            SET Order_Status = 'delivered'
-            WHERE BuyerID = %s AND OrderID = %s
-            """
-            cursor.execute(update_query, (user_id, order_id))
-            connection.commit()
-
-            update_query = """
-            UPDATE seller_order
-            SET Order_Status = 'delivered'
-            WHERE OrderID = %s
-            """
-            cursor.execute(update_query, (order_id,))
-            connection.commit()
-
+        mark_order_delivered(order_id, user_id)
     except mysql.connector.Error as err:
-        print(f"Error: {err}")
+        logger.error("Database error: %s", err)
        
-    return redirect(url_for('homepage_buyer.shipping_orders', order_type='shipping', order_details=order_details, categories=categories, refresh_page='true'))
+    return redirect(url_for('homepage_buyer.shipping_orders', order_type='shipping', refresh_page='true'))
 
 @homepage_buyer_app.route('/delivered-orders', methods=['POST','GET'])
+@query_budget(3)
 def delivered_orders():
-    user_id = session.get("user_id")
-    if not user_id:
-        return redirect('/login') 
-    order_details = []  
-    sort = request.args.get('sort', 'recent')
-   
-    try:
-        with get_db_connection() as connection:
-            cursor = connection.cursor(dictionary=True)
-            categories=get_categories()
-
-            order_by = 'ASC' if sort == 'old' else 'DESC'
-
-            query_orders = f"""
-            SELECT OrderID, ProductID, VariationID, Quantity, Total_Amount, Payment_OptionsID, Shipping_Date, Order_Date, AddressID
-            FROM buyer_order
-            WHERE Order_Status = 'delivered' AND BuyerID = %s
-            ORDER BY Order_Date {order_by}
-            """
-            cursor.execute(query_orders, (user_id,))
-            orders = cursor.fetchall()
-            print(orders)
-            for order in orders:
-                product_id = order['ProductID']
-                variation_id = order['VariationID']
-                order_date = order['Order_Date']
-                address_id = order.get('AddressID')
-                payment_optionsid = order.get('Payment_OptionsID')
-
-                query_product = """
-                SELECT Product_Name, ImageFileName, Shipping_Fee
-                FROM product
-                WHERE ProductID = %s
-                """
-                cursor.execute(query_product, (product_id,))
-                product_info = cursor.fetchone()
-               
-                print(product_info)
-             
-                query_variation = """
-                SELECT Unit, Price
-                FROM product_variation
-                WHERE VariationID = %s
-                """
-                cursor.execute(query_variation, (variation_id,))
-                variation_info = cursor.fetchone()
-                
-                buyer_address = ""
-                if address_id:
-                    cursor.execute("""
-                    SELECT Full_Name, Phone_Number, Street, Municipality, Province, Zip_Code
-                    FROM buyer_addresses
-                    WHERE AddressID = %s
-                    """, (address_id,))
-                    addr = cursor.fetchone()
-                    if addr:
-                        buyer_address = f"{addr['Full_Name']}, {addr['Phone_Number']}, {addr['Street']}, {addr['Municipality']}, {addr['Province']} {addr['Zip_Code']}"
-               
-                payment_opt = ""
-                if payment_optionsid:
-                    cursor.execute("""
-                    SELECT Payment_Method, Account_Number
-                    FROM buyer_payment_options
-                    WHERE Payment_OptionsID = %s
-                    """, (payment_optionsid,))
-                    payment = cursor.fetchone()
-                    if payment:
-                        payment_opt = f"{payment['Payment_Method']}, {payment['Account_Number']}"
-
-                order_detail = {
-                    'ImageFileName': product_info['ImageFileName'],
-                    'Product_Name': product_info['Product_Name'],
-                    'Shipping_Fee': product_info['Shipping_Fee'],
-                    'Unit': variation_info['Unit'],
-                    'Price': variation_info['Price'],
-                    'Total_Amount': order['Total_Amount'],
-                    'OrderID': order['OrderID'],
-                    'Shipping_Date': order['Shipping_Date'],
-                    'Quantity': order['Quantity'],
-                    'Order_Date': order['Order_Date'],
-                    'Buyer_Address': buyer_address,
-                    'Payment_Option': payment_opt
-                }
-                order_details.append(order_detail)
-
-    except mysql.connector.Error as err:
-        print(f"Error: {err}")
-   
-    order_type = 'delivered'
-    return render_template('buyer_order.html', order_details=order_details, order_type=order_type, categories=categories)
-
-def get_cancelled_orders_data(user_id, sort='recent'):
-    order_details = []
-
-    try:
-        with get_db_connection() as connection:
-            cursor = connection.cursor(dictionary=True)
-
-            categories = get_categories()
-
-            if sort == 'old':
-                order_by = 'ASC'
-            else:
-                order_by = 'DESC'
-
-            query_orders = f"""
-            SELECT OrderID, ProductID, VariationID, Quantity, Total_Amount, Order_Date, Payment_OptionsID, Order_Date, AddressID
-            FROM buyer_order
-            WHERE Order_Status = 'cancelled' AND BuyerID = %s
-            ORDER BY Order_Date {order_by}
-            """
-            cursor.execute(query_orders, (user_id,))
-            orders = cursor.fetchall()
-           
-            for order in orders:
-                order_id = order['OrderID']
-                product_id = order['ProductID']
-                variation_id = order['VariationID']
-                quantity = order['Quantity']
-                order_date = order['Order_Date']
-                address_id = order.get('AddressID')
-                payment_optionsid = order.get('Payment_OptionsID')
-
-                query_product = """
-                SELECT Product_Name, ImageFileName, Shipping_Fee
-                FROM product
-                WHERE ProductID = %s
-                """
-                cursor.execute(query_product, (product_id,))
-                product_info = cursor.fetchone()
-
-                query_variation = """
-                SELECT Unit, Price
-                FROM product_variation
-                WHERE VariationID = %s
-                """
-                cursor.execute(query_variation, (variation_id,))
-                variation_info = cursor.fetchone()
-
-                buyer_address = ""
-                if address_id:
-                    cursor.execute("""
-                    SELECT Full_Name, Phone_Number, Street, Municipality, Province, Zip_Code
-                    FROM buyer_addresses
-                    WHERE AddressID = %s
-                    """, (address_id,))
-                    addr = cursor.fetchone()
-                    if addr:
-                        buyer_address = f"{addr['Full_Name']}, {addr['Phone_Number']}, {addr['Street']}, {addr['Municipality']}, {addr['Province']} {addr['Zip_Code']}"
-
-                payment_opt = ""
-                if payment_optionsid:
-                    cursor.execute("""
-                    SELECT Payment_Method, Account_Number
-                    FROM buyer_payment_options
-                    WHERE Payment_OptionsID = %s
-                    """, (payment_optionsid,))
-                    payment = cursor.fetchone()
-                    if payment:
-                        payment_opt = f"{payment['Payment_Method']}, {payment['Account_Number']}"
-
-                order_detail = {
-                    'ImageFileName': product_info['ImageFileName'],
-                    'Product_Name': product_info['Product_Name'],
-                    'Shipping_Fee': product_info['Shipping_Fee'],
-                    'Unit': variation_info['Unit'],
-                    'Quantity': order['Quantity'],
-                    'OrderID': order['OrderID'],
-                    'Price': variation_info['Price'],
-                    'Total_Amount': order['Total_Amount'],
-                    'Order_Date': order['Order_Date'],
-                    'Buyer_Address': buyer_address,
-                    'Payment_Option': payment_opt
-                }
-                order_details.append(order_detail)
-
-    except mysql.connector.Error as err:
-        print(f"Error: {err}")
-
-    return order_details, categories
+    return render_orders('delivered')
 
 @homepage_buyer_app.route('/cancelled-orders', methods=['POST','GET'])
+@query_budget(3)
 def cancelled_orders():
-    user_id = session.get("user_id")
-    if not user_id:
-        return redirect('/login') 
-    sort = request.args.get('sort', 'recent')
-    order_details, categories = get_cancelled_orders_data(user_id, sort)
-
-    order_type = 'cancelled'
-    return render_template('buyer_order.html', order_details=order_details, order_type=order_type, categories=categories)
-
-def get_to_ship_orders_data(user_id, sort='recent'):
-    order_details = []
-   
-    sort = request.args.get('sort', 'recent')
-
-    if sort == 'old':
-        order_by = 'ASC'
-    else:
-        order_by = 'DESC'
-
-    try:
-        with get_db_connection() as connection:
-            cursor = connection.cursor(dictionary=True)
-
-            categories = get_categories()
-
-            query_orders = f"""
-            SELECT OrderID, ProductID, VariationID, Quantity, Total_Amount, Order_Date, Payment_OptionsID, Order_Date, AddressID
-            FROM buyer_order
-            WHERE Order_Status = 'pending' AND BuyerID = %s
-            ORDER BY Order_Date {order_by}
-            """
-            cursor.execute(query_orders, (user_id,))
-            orders = cursor.fetchall()
-           
-            for order in orders:
-                order_id = order['OrderID']
-                product_id = order['ProductID']
-                variation_id = order['VariationID']
-                quantity = order['Quantity']
-                order_date = order['Order_Date']
-                address_id = order.get('AddressID')
-                payment_optionsid = order.get('Payment_OptionsID')
-
-                query_product = """
-                SELECT Product_Name, ImageFileName, Shipping_Fee
-                FROM product
-                WHERE ProductID = %s
-                """
-                cursor.execute(query_product, (product_id,))
-                product_info = cursor.fetchone()
-
-                query_variation = """
-                SELECT Unit, Price
-                FROM product_variation
-                WHERE VariationID = %s
-                """
-                cursor.execute(query_variation, (variation_id,))
-                variation_info = cursor.fetchone()
-
-                buyer_address = ""
-                if address_id:
-                    cursor.execute("""
-                    SELECT Full_Name, Phone_Number, Street, Municipality, Province, Zip_Code
-                    FROM buyer_addresses
-                    WHERE AddressID = %s
-                    """, (address_id,))
-                    addr = cursor.fetchone()
-                    if addr:
-                        buyer_address = f"{addr['Full_Name']}, {addr['Phone_Number']}, {addr['Street']}, {addr['Municipality']}, {addr['Province']} {addr['Zip_Code']}"
-
-                payment_opt = ""
-                if payment_optionsid:
-                    cursor.execute("""
-                    SELECT Payment_Method, Account_Number
-                    FROM buyer_payment_options
-                    WHERE Payment_OptionsID = %s
-                    """, (payment_optionsid,))
-                    payment = cursor.fetchone()
-                    if payment:
-                        payment_opt = f"{payment['Payment_Method']}, {payment['Account_Number']}"
-
-                order_detail = {
-                    'ImageFileName': product_info['ImageFileName'],
-                    'Product_Name': product_info['Product_Name'],
-                    'Shipping_Fee': product_info['Shipping_Fee'],
-                    'Unit': variation_info['Unit'],
-                    'Quantity': order['Quantity'],
-                    'OrderID': order['OrderID'],
-                    'Price': variation_info['Price'],
-                    'Total_Amount': order['Total_Amount'],
-                    'Order_Date': order['Order_Date'],
-                    'Buyer_Address': buyer_address,
-                    'Payment_Option': payment_opt
-                }
-                order_details.append(order_detail)
-
-    except mysql.connector.Error as err:
-        print(f"Error: {err}")
-   
-    return order_details, categories
+    return render_orders('cancelled')
 
 @homepage_buyer_app.route('/cancel-order/<order_id>', methods=['POST', 'GET'])
 def cancel_to_pay(order_id):
     user_id = session.get("user_id")
     if not user_id:
         return redirect('/login') 
- 
-    order_details, categories = get_to_pay_orders_data(user_id)
 
     try:
-        with get_db_connection() as connection:
-            cursor = connection.cursor()
-
-            update_query = """
-            UPDATE buyer_order
-            SET Order_Status = 'cancelled'
-            WHERE BuyerID = %s AND OrderID = %s
-            """
-            cursor.execute(update_query, (user_id, order_id))
-            connection.commit()
-
-            update_query = """
-            UPDATE seller_order
-            SET Order_Status = 'cancelled'
-            WHERE OrderID = %s
-            """
-            cursor.execute(update_query, (order_id,))
-            connection.commit()
-
-            get_variation_id_query = "SELECT VariationID FROM buyer_order WHERE OrderID = %s"
-            cursor.execute(get_variation_id_query, (order_id,))
-            variation_id = cursor.fetchone()[0]
-
-            buyer_order_quantity_query = "SELECT Quantity FROM buyer_order WHERE OrderID = %s"
-            cursor.execute(buyer_order_quantity_query, (order_id,))
-            by_quantity = cursor.fetchone()[0]
-            print(by_quantity)
-
-            product_variation_quantity_query = "SELECT Quantity FROM product_variation WHERE VariationID = %s"
-            cursor.execute(product_variation_quantity_query, (variation_id,))      
-            pv_quantity = cursor.fetchone()[0]
-            print(pv_quantity)
-
-            new_quantity = max(pv_quantity + by_quantity, 0)
-            print(new_quantity)
-
-            update_query = "UPDATE product_variation SET Quantity = %s WHERE VariationID = %s"
-            cursor.execute(update_query, (new_quantity, variation_id))
-            connection.commit()
-
+        cancel_order(order_id, 'waiting for payment', buyer_id=user_id)
     except mysql.connector.Error as err:
-        print(f"Error: {err}")
-   
-    order_type = 'to_pay'
+        logger.error("Database error: %s", err)
 
     return redirect(url_for('homepage_buyer.to_pay_orders'))
 
@@ -937,52 +544,10 @@ def cancel_to_ship(order_id):
     user_id = session.get("user_id")
     if not user_id:
         return redirect('/login') 
-   
-    order_details, categories = get_to_ship_orders_data(user_id)
-    try:
-        with get_db_connection() as connection:
-            cursor = connection.cursor()
-
-            update_query = """
-            UPDATE buyer_order
-            SET Order_Status = 'cancelled'
-            WHERE BuyerID = %s AND OrderID = %s
-            """
-            cursor.execute(update_query, (user_id, order_id))
-            connection.commit()
-
-            update_query = """
-            UPDATE seller_order
-            SET Order_Status = 'cancelled'
-            WHERE OrderID = %s
-            """
-            cursor.execute(update_query, (order_id,))
-            connection.commit()
-
-            get_variation_id_query = "SELECT VariationID FROM buyer_order WHERE OrderID = %s"
-            cursor.execute(get_variation_id_query, (order_id,))
-            variation_id = cursor.fetchone()[0]
-
-            buyer_order_quantity_query = "SELECT Quantity FROM buyer_order WHERE OrderID = %s"
-            cursor.execute(buyer_order_quantity_query, (order_id,))
-            by_quantity = cursor.fetchone()[0]
-            print(by_quantity)
-
-            product_variation_quantity_query = "SELECT Quantity FROM product_variation WHERE VariationID = %s"
-            cursor.execute(product_variation_quantity_query, (variation_id,))      
-            pv_quantity = cursor.fetchone()[0]
-            print(pv_quantity)
-
-            new_quantity = max(pv_quantity + by_quantity, 0)
-            print(new_quantity)
-
-            update_query = "UPDATE product_variation SET Quantity = %s WHERE VariationID = %s"
-            cursor.execute(update_query, (new_quantity, variation_id))
-            connection.commit()
 
+    try:
+        cancel_order(order_id, 'pending', buyer_id=user_id)
     except mysql.connector.Error as err:
-        print(f"Error: {err}")
-
-    order_type = 'to_ship'
+        logger.error("Database error: %s", err)
 
     return redirect(url_for('homepage_buyer.to_ship_orders'))
\ No newline at end of file
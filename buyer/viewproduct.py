@@ -1,43 +1,20 @@
 from flask import Blueprint, request, render_template, redirect, session
 import mysql.connector
+from database.db import get_db_connection
+from database.ids import next_id
+from services.catalog import catalog_etag, get_catalog_version
+from services.geo import distances_km
+from services.http_cache import is_fresh, not_modified, with_etag
+from services.reference import get_categories, get_category_name
 from flask import jsonify
 from dotenv import load_dotenv
 import os
-import math
+import logging
 
 load_dotenv()
 
 viewproduct_app = Blueprint('viewproduct', __name__)
-
-db_config = {
-    "host": os.getenv("AIVEN_HOST"),
-    "port": int(os.getenv("AIVEN_PORT", 19441)), 
-    "user": os.getenv("AIVEN_USER"),
-    "password": os.getenv("AIVEN_PASSWORD"),
-    "database": os.getenv("AIVEN_DATABASE"),
-    "use_pure": True                          
-}
-
-def get_db_connection():
-    try:
-        connection = mysql.connector.connect(**db_config)
-        return connection
-    except mysql.connector.Error as err:
-        print(f"Error: {err}")
-        return None
-    
-def haversine_distance(lat1, lon1, lat2, lon2):
-    R = 6371  # Earth radius in km
-    phi1 = math.radians(lat1)
-    phi2 = math.radians(lat2)
-    delta_phi = math.radians(lat2 - lat1)
-    delta_lambda = math.radians(lon2 - lon1)
-
-    a = math.sin(delta_phi/2)**2 + math.cos(phi1) * math.cos(phi2) * math.sin(delta_lambda/2)**2
-    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1-a))
-
-    distance = R * c
-    return round(distance, 2)  # distance in km, rounded to 2 decimals
+logger = logging.getLogger(__name__)
 
 @viewproduct_app.route('/viewproduct/<string:product_id>')
 def viewproduct(product_id):
@@ -47,6 +24,18 @@ def viewproduct(product_id):
     with get_db_connection() as connection:
         cursor = connection.cursor(dictionary=True)
 
+        # Get buyer's default address
+        cursor.execute("""
+            SELECT Latitude, Longitude 
+            FROM buyer_addresses
+            WHERE BuyerID = %s AND isDefault = 1
+        """, (user_id,))
+        buyer_address = cursor.fetchone()
+
+        etag = catalog_etag(get_catalog_version(cursor), product_id, user_id, buyer_address)
+        if is_fresh(etag):
+            return not_modified(etag)
+
         query = f"""
         SELECT p.ProductID, p.Product_Name, p.CategoryID, p.AddressID, pv.Price, p.ImageFileName, pv.Unit, pv.Quantity
         FROM product p
@@ -59,29 +48,26 @@ def viewproduct(product_id):
         if not product_data:
             return "Product not found", 404
         
-        # Get buyer's default address
-        cursor.execute("""
-            SELECT Latitude, Longitude 
-            FROM buyer_addresses
-            WHERE BuyerID = %s AND isDefault = 1
-        """, (user_id,))
-        buyer_address = cursor.fetchone()
         buyer_lat = float(buyer_address['Latitude'])
         buyer_lon = float(buyer_address['Longitude'])
 
-        # For each product, get seller address
+        # Get each distinct seller address once and measure them in one pass
+        address_ids = list({product['AddressID'] for product in product_data})
+        placeholders = ', '.join(['%s'] * len(address_ids))
+        cursor.execute(f"""
+            SELECT AddressID, Latitude, Longitude, Municipality, Region
+            FROM seller_addresses
+            WHERE AddressID IN ({placeholders})
+        """, tuple(address_ids))
+        seller_addresses = {row['AddressID']: row for row in cursor.fetchall()}
+        distances = distances_km(buyer_lat, buyer_lon,
+                                 [float(seller_addresses[a]['Latitude']) for a in address_ids],
+                                 [float(seller_addresses[a]['Longitude']) for a in address_ids])
+        distance_by_address = dict(zip(address_ids, distances.round(2).tolist()))
+
         for product in product_data:
-            cursor.execute("""
-                SELECT Latitude, Longitude, Municipality, Region
-                FROM seller_addresses
-                WHERE AddressID = %s
-            """, (product['AddressID'],))
-            seller_address = cursor.fetchone()
-            seller_lat = float(seller_address['Latitude'])
-            seller_lon = float(seller_address['Longitude'])
-
-            # Calculate distance
-            product['Distance_km'] = haversine_distance(buyer_lat, buyer_lon, seller_lat, seller_lon)
+            seller_address = seller_addresses[product['AddressID']]
+            product['Distance_km'] = distance_by_address[product['AddressID']]
             product['Municipality'] = seller_address['Municipality']
             product['Region'] = seller_address['Region']
 
@@ -129,19 +115,11 @@ def viewproduct(product_id):
                     grouped_products[key]['Prices'].append(product['Price'])
 
         grouped_product_data = list(grouped_products.values())
-        category_query = "SELECT CategoryID, Category_Name FROM product_category"
-        cursor.execute(category_query)
-        categories = cursor.fetchall()
-
-        category_name_query = f"""
-        SELECT Category_Name
-        FROM product_category
-        WHERE CategoryID = '{product['CategoryID']}'
-        """
-        cursor.execute(category_name_query)
-        category_name = cursor.fetchone()
+        categories = get_categories()
+        category_name = {'Category_Name': get_category_name(product['CategoryID'])}
 
-        return render_template('viewproduct.html', product_data=grouped_product_data, categories=categories, category_name=category_name)
+        return with_etag(render_template('viewproduct.html', product_data=grouped_product_data, categories=categories,
+                                         category_name=category_name), etag)
 
 @viewproduct_app.route('/api/view-product-variation', methods=['POST'])
 def viewprovar():
@@ -151,11 +129,7 @@ def viewprovar():
     data = request.json
     selected_unit = data.get('unit')
     product_id = data.get('product_id')
-    print("product_id")
-    print(product_id)
-    print("unit:", selected_unit)
-    print("Raw data:", request.data)
-    print("Parsed JSON:", data)
+    logger.debug("Variation lookup product=%s unit=%s", product_id, selected_unit)
 
     query = f"SELECT Price, Quantity FROM product_variation WHERE Unit = '{selected_unit}' AND ProductID = '{product_id}'"
    
@@ -209,7 +183,7 @@ def add_to_cart_quan():
                 response_data = {'status': 'error', 'message': 'Product not found.'}
    
         except mysql.connector.Error as err:
-            print(f"Error: {err}")
+            logger.error("Database error: %s", err)
             response_data = {'status': 'error', 'message': 'Error executing SQL query.'}
 
         finally:
@@ -230,7 +204,6 @@ def view_product_variation():
     unit_var = data.get('unit')
     product_id = data.get('product_id')
 
-    print(unit_var)
    
     connection = get_db_connection()
 
@@ -240,7 +213,6 @@ def view_product_variation():
             query = f"SELECT VariationID FROM product_variation WHERE Unit = '{unit_var}' AND ProductID ='{product_id}'"
             cursor.execute(query)
             product_variation_info = cursor.fetchone()
-            print(product_variation_info)
             if product_variation_info:
                 variation_id = product_variation_info['VariationID']
 
@@ -252,7 +224,7 @@ def view_product_variation():
                 response_data = {'status': 'error', 'message': 'Product variation not found.'}
 
         except mysql.connector.Error as err:
-            print(f"Error: {err}")
+            logger.error("Database error: %s", err)
             response_data = {'status': 'error', 'message': 'Error executing SQL query.'}
 
         finally:
@@ -269,22 +241,7 @@ def generate_cart_id():
     user_id = session.get("user_id")
     if not user_id:
         return redirect('/login') 
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute(f"SELECT MAX(CartID) FROM cart")
-    latest_cart_id = cursor.fetchone()[0]
-
-    if latest_cart_id is not None:
-        numeric_part = int(latest_cart_id[2:])
-        new_numeric_part = numeric_part + 1
-    else:
-        new_numeric_part = 1000
-
-    cart_id = f"CT{new_numeric_part}"
-    cursor.close()
-    conn.close()
-
-    return cart_id
+    return next_id('cart')
 
 @viewproduct_app.route('/api/insert-into-cart', methods=['POST'])
 def insert_into_cart():
@@ -354,7 +311,7 @@ def insert_into_cart():
                 response_data = {'status': 'success', 'message': 'Cart item added successfully'}
 
     except mysql.connector.Error as err:
-        print(f"Error: {err}")
+        logger.error("Database error: %s", err)
         response_data = {'status': 'error', 'message': 'Error executing SQL query.'}
        
     finally:
@@ -0,0 +1,121 @@
+from flask import g, has_app_context
+import mysql.connector
+from mysql.connector import pooling
+from dotenv import load_dotenv
+from database.instrumentation import InstrumentedCursor, init_instrumentation, record_connection
+import os
+import threading
+import time
+
+load_dotenv()
+
+db_config = {
+    "host": os.getenv("AIVEN_HOST"),
+    "port": int(os.getenv("AIVEN_PORT", 19441)),
+    "user": os.getenv("AIVEN_USER"),
+    "password": os.getenv("AIVEN_PASSWORD"),
+    "database": os.getenv("AIVEN_DATABASE"),
+    "use_pure": True,
+    # buffered cursors let helpers share one connection without "Unread result found"
+    "buffered": True
+}
+
+# Connections held open by each gunicorn worker (mysql-connector caps a pool at 32)
+POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 5))
+# Seconds to wait for a free connection before giving up
+POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 10))
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    global _pool, _pool_pid
+
+    # gunicorn forks workers after the app is imported, so the pool is built
+    # lazily and rebuilt whenever we find ourselves in a new process
+    pid = os.getpid()
+    if _pool is None or _pool_pid != pid:
+        with _pool_lock:
+            if _pool is None or _pool_pid != pid:
+                _pool = pooling.MySQLConnectionPool(
+                    pool_name=f"agrimart_{pid}",
+                    pool_size=POOL_SIZE,
+                    pool_reset_session=True,
+                    **db_config
+                )
+                _pool_pid = pid
+    return _pool
+
+
+def _checkout_connection():
+    pool = get_pool()
+    record_connection()
+    deadline = time.monotonic() + POOL_TIMEOUT
+
+    while True:
+        try:
+            # get_connection() pings the connection and reconnects it if the
+            # server dropped it while it sat idle in the pool
+            return pool.get_connection()
+        except mysql.connector.errors.PoolError:
+            if time.monotonic() >= deadline:
+                raise
+            time.sleep(0.05)
+
+
+class DBConnection:
+    """Pooled connection handed out by get_db_connection().
+
+    Inside a request the same connection is reused by every helper, so close()
+    is a no-op and the connection goes back to the pool at teardown.
+    """
+
+    def __init__(self, cnx, request_scoped=False):
+        self._cnx = cnx
+        self._request_scoped = request_scoped
+
+    def __getattr__(self, name):
+        return getattr(self._cnx, name)
+
+    def cursor(self, *args, **kwargs):
+        return InstrumentedCursor(self._cnx.cursor(*args, **kwargs))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        if not self._request_scoped:
+            self.release()
+
+    def release(self):
+        if self._cnx is not None:
+            cnx, self._cnx = self._cnx, None
+            # returning to the pool resets the session, discarding uncommitted work
+            cnx.close()
+
+
+def get_db_connection(request_scoped=True):
+    # request_scoped=False hands out a separate connection that is really
+    # closed by close(), for work that must commit independently of the request
+    if not request_scoped or not has_app_context():
+        return DBConnection(_checkout_connection())
+
+    if '_db_connection' not in g:
+        g._db_connection = DBConnection(_checkout_connection(), request_scoped=True)
+    return g._db_connection
+
+
+def close_db_connection(exception=None):
+    connection = g.pop('_db_connection', None)
+    if connection is not None:
+        connection.release()
+
+
+def init_db(app):
+    app.teardown_appcontext(close_db_connection)
+    init_instrumentation(app)
@@ -0,0 +1,108 @@
+from database.db import get_db_connection
+import os
+import threading
+
+# IDs handed to each process per round trip. Unused IDs of a block are lost
+# when the worker exits, and the VARCHAR(6) columns only fit up to 9999, so
+# keep this small.
+ID_BLOCK_SIZE = int(os.getenv("ID_BLOCK_SIZE", 10))
+
+# sequence name -> (prefix, columns whose existing IDs seed the sequence)
+SEQUENCES = {
+    # buyer_order and seller_order rows of one purchase share an OrderID
+    'order': ('OR', [('buyer_order', 'OrderID'), ('seller_order', 'OrderID')]),
+    'product': ('PD', [('product', 'ProductID')]),
+    'variation': ('VT', [('product_variation', 'VariationID')]),
+    'cart': ('CT', [('cart', 'CartID')]),
+    'buyer': ('BY', [('buyer', 'BuyerID')]),
+    'seller': ('SL', [('seller', 'SellerID')]),
+    'buyer_address': ('BA', [('buyer_addresses', 'AddressID')]),
+    'seller_address': ('SA', [('seller_addresses', 'AddressID')]),
+    'buyer_payment_option': ('PO', [('buyer_payment_options', 'Payment_OptionsID')]),
+    'seller_payment_option': ('PO', [('payment_options', 'Payment_OptionsID')]),
+}
+
+FIRST_ID = 1000
+
+
+class IdAllocator:
+    """Hands out prefixed IDs from a block reserved in the id_sequence table.
+
+    Reserving a block is a single UPDATE committed on its own connection, so
+    concurrent workers never get the same ID and the request transaction
+    never holds the sequence row lock.
+    """
+
+    def __init__(self, name, prefix, sources):
+        self.name = name
+        self.prefix = prefix
+        self.sources = sources
+        self._lock = threading.Lock()
+        self._next = 0
+        self._end = 0
+        self._pid = None
+
+    def next_ids(self, count):
+        ids = []
+        with self._lock:
+            # a forked gunicorn worker must not reuse its parent's block
+            if self._pid != os.getpid():
+                self._next = self._end = 0
+                self._pid = os.getpid()
+
+            while len(ids) < count:
+                if self._next >= self._end:
+                    self._next, self._end = self._reserve(max(ID_BLOCK_SIZE, count - len(ids)))
+                take = min(count - len(ids), self._end - self._next)
+                ids.extend(f"{self.prefix}{number}" for number in range(self._next, self._next + take))
+                self._next += take
+        return ids
+
+    def _reserve(self, size):
+        conn = get_db_connection(request_scoped=False)
+        cursor = conn.cursor()
+        try:
+            if not self._advance(cursor, size):
+                self._seed(cursor)
+                self._advance(cursor, size)
+            cursor.execute("SELECT LAST_INSERT_ID()")
+            end = cursor.fetchone()[0]
+            conn.commit()
+            return end - size, end
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+            conn.close()
+
+    def _advance(self, cursor, size):
+        # LAST_INSERT_ID(expr) returns the new value to this connection only
+        cursor.execute("""
+            UPDATE id_sequence
+            SET Next_Value = LAST_INSERT_ID(Next_Value + %s)
+            WHERE Name = %s
+        """, (size, self.name))
+        return cursor.rowcount == 1
+
+    def _seed(self, cursor):
+        # one-off scan so new IDs continue after the ones already in use
+        latest = ', '.join(
+            f"(SELECT COALESCE(MAX(CAST(SUBSTRING({column}, 3) AS UNSIGNED)), {FIRST_ID - 1}) FROM {table})"
+            for table, column in self.sources
+        )
+        if len(self.sources) > 1:
+            latest = f"GREATEST({latest})"
+        cursor.execute(f"INSERT IGNORE INTO id_sequence (Name, Next_Value) SELECT %s, {latest} + 1",
+                       (self.name,))
+
+
+_allocators = {name: IdAllocator(name, prefix, sources) for name, (prefix, sources) in SEQUENCES.items()}
+
+
+def next_ids(name, count):
+    return _allocators[name].next_ids(count)
+
+
+def next_id(name):
+    return next_ids(name, 1)[0]
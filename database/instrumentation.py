@@ -0,0 +1,112 @@
+from flask import current_app, g, has_request_context, request
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+# Query budget for endpoints without a @query_budget of their own (0 = none)
+DEFAULT_QUERY_BUDGET = int(os.getenv("DB_QUERY_BUDGET", 0))
+
+
+def _stats():
+    if not has_request_context():
+        return None
+    return g.get('_db_stats')
+
+
+def record_connection():
+    stats = _stats()
+    if stats is not None:
+        stats['connections'] += 1
+
+
+class InstrumentedCursor:
+    """Cursor wrapper that adds each query's time and fetched rows to the request's totals."""
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        return iter(self.fetchall())
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._cursor.close()
+
+    def _timed(self, method, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            stats = _stats()
+            if stats is not None:
+                stats['queries'] += 1
+                stats['db_time'] += time.perf_counter() - start
+
+    def _count_rows(self, rows):
+        stats = _stats()
+        if stats is not None and rows:
+            stats['rows'] += len(rows) if isinstance(rows, list) else 1
+        return rows
+
+    def execute(self, *args, **kwargs):
+        return self._timed(self._cursor.execute, *args, **kwargs)
+
+    def executemany(self, *args, **kwargs):
+        return self._timed(self._cursor.executemany, *args, **kwargs)
+
+    def fetchone(self):
+        return self._count_rows(self._cursor.fetchone())
+
+    def fetchmany(self, *args, **kwargs):
+        return self._count_rows(self._cursor.fetchmany(*args, **kwargs))
+
+    def fetchall(self):
+        return self._count_rows(self._cursor.fetchall())
+
+
+def query_budget(max_queries):
+    """Warn when a request to the decorated view issues more than max_queries queries."""
+    def decorator(view):
+        view.query_budget = max_queries
+        return view
+    return decorator
+
+
+def start_request_stats():
+    g._db_stats = {'queries': 0, 'db_time': 0.0, 'connections': 0, 'rows': 0,
+                   'started': time.perf_counter()}
+
+
+def report_request_stats(response):
+    stats = g.pop('_db_stats', None)
+    if stats is None:
+        return response
+
+    total_ms = (time.perf_counter() - stats['started']) * 1000
+    db_ms = stats['db_time'] * 1000
+    response.headers.add('Server-Timing', f'db;dur={db_ms:.1f};desc="{stats["queries"]} queries"')
+    response.headers.add('Server-Timing', f'app;dur={total_ms:.1f}')
+
+    endpoint = request.endpoint or '-'
+    logger.info("db_stats endpoint=%s method=%s status=%s queries=%d db_ms=%.1f connections=%d rows=%d total_ms=%.1f",
+                endpoint, request.method, response.status_code, stats['queries'], db_ms,
+                stats['connections'], stats['rows'], total_ms)
+
+    view = current_app.view_functions.get(request.endpoint)
+    budget = getattr(view, 'query_budget', DEFAULT_QUERY_BUDGET)
+    if budget and stats['queries'] > budget:
+        logger.warning("query budget exceeded endpoint=%s queries=%d budget=%d",
+                       endpoint, stats['queries'], budget)
+    return response
+
+
+def init_instrumentation(app):
+    app.before_request(start_request_stats)
+    app.after_request(report_request_stats)
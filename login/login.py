@@ -1,5 +1,6 @@
 from flask import Blueprint, render_template, request, redirect, flash, session
 import mysql.connector
+from database.db import get_db_connection
 from werkzeug.security import generate_password_hash, check_password_hash
 import bcrypt
 from dotenv import load_dotenv
@@ -9,18 +10,6 @@ load_dotenv()
 
 login_app = Blueprint('login', __name__)
 
-db_config = {
-    "host": os.getenv("AIVEN_HOST"),
-    "port": int(os.getenv("AIVEN_PORT", 19441)),  
-    "user": os.getenv("AIVEN_USER"),
-    "password": os.getenv("AIVEN_PASSWORD"),
-    "database": os.getenv("AIVEN_DATABASE"),
-    "use_pure": True                                 
-}
-
-def get_db_connection():
-    return mysql.connector.connect(**db_config)
-
 def validate_credentials(username, password):
     conn = get_db_connection()
     cursor = conn.cursor()
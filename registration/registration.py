@@ -1,5 +1,7 @@
 from flask import Blueprint, render_template, request, redirect, flash
 import mysql.connector
+from database.db import get_db_connection
+from database.ids import next_id
 from werkzeug.security import generate_password_hash, check_password_hash  # Import from werkzeug
 from dotenv import load_dotenv
 import os
@@ -8,18 +10,6 @@ load_dotenv()
 
 registration_app = Blueprint('registration', __name__)
 
-db_config = {
-    "host": os.getenv("AIVEN_HOST"),
-    "port": int(os.getenv("AIVEN_PORT", 19441)),  
-    "user": os.getenv("AIVEN_USER"),
-    "password": os.getenv("AIVEN_PASSWORD"),
-    "database": os.getenv("AIVEN_DATABASE"),
-    "use_pure": True                                
-}
-
-def get_db_connection():
-    return mysql.connector.connect(**db_config)
-
 def is_username_unique(table_name, username):
     conn = get_db_connection()
     cursor = conn.cursor()
@@ -46,7 +36,7 @@ class User:
         hashed_password = generate_password_hash(password)
         return hashed_password
 
-    def insert_into_database(self, table_name, custom_prefix):
+    def insert_into_database(self, table_name):
         conn = get_db_connection()
         cursor = conn.cursor()
 
@@ -55,16 +45,7 @@ class User:
             conn.close()
             return "Username already exists. Please choose a different username."
 
-        cursor.execute(f"SELECT MAX({table_name}ID) FROM {table_name}")
-        latest_id = cursor.fetchone()[0]
-
-        if latest_id is not None:
-            numeric_part = int(latest_id[2:])
-            new_numeric_part = numeric_part + 1
-        else:
-            new_numeric_part = 1000
-
-        user_id = f"{custom_prefix}{new_numeric_part}"
+        user_id = next_id(table_name)
 
         sql_query = f"INSERT INTO {table_name} ({table_name}ID, Name, Email, Phone_Number, Username, Password) VALUES (%s, %s, %s, %s, %s, %s)"
         values = (user_id, self.name, self.email, self.phone_number, self.username, self.password)
@@ -82,11 +63,11 @@ class User:
 
 class Buyer(User):
     def insert_into_database(self):
-        return super().insert_into_database("buyer", "BY")
+        return super().insert_into_database("buyer")
 
 class Seller(User):
     def insert_into_database(self):
-        return super().insert_into_database("seller", "SL")
+        return super().insert_into_database("seller")
 
 @registration_app.route('/select_role', methods=['GET', 'POST'])
 def select_role():
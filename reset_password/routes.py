@@ -5,6 +5,7 @@ from dotenv import load_dotenv
 import os
 
 from reset_password.utils import send_reset_email
+from database.db import get_db_connection
 
 load_dotenv()
 
@@ -90,15 +91,4 @@ def reset_password(token):
             flash('Your password has been reset successfully.', 'success')
             return redirect(url_for('login.login'))
 
-    return render_template('reset_password.html', token=token)
-
-# --- DB helper (should match the one from app.py) ---
-def get_db_connection():
-    return mysql.connector.connect(
-        host=os.getenv("AIVEN_HOST"),
-        port=os.getenv("AIVEN_PORT"),
-        user=os.getenv("AIVEN_USER"),
-        password=os.getenv("AIVEN_PASSWORD"),
-        database=os.getenv("AIVEN_DATABASE"),
-        use_pure=True
-    )
\ No newline at end of file
+    return render_template('reset_password.html', token=token)
\ No newline at end of file
@@ -0,0 +1,46 @@
+"""Create the resized WebP/JPEG variants of product images uploaded before they existed.
+
+Run from the project root; images that already have every variant are skipped
+unless --force is given:
+
+    python scripts/backfill_images.py [--force]
+
+Running app workers start serving the new variants within
+VARIANT_RECHECK_SECONDS.
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.images import create_variants, variant_paths
+
+UPLOAD_FOLDER = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'static', 'images', 'products')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--force', action='store_true', help='recreate variants that already exist')
+    args = parser.parse_args()
+
+    created = skipped = failed = 0
+    for image_filename in sorted(os.listdir(UPLOAD_FOLDER)):
+        if not os.path.isfile(os.path.join(UPLOAD_FOLDER, image_filename)):
+            continue
+        if not args.force and all(os.path.exists(path) for path in variant_paths(UPLOAD_FOLDER, image_filename)):
+            skipped += 1
+            continue
+        try:
+            create_variants(UPLOAD_FOLDER, image_filename)
+            created += 1
+        except OSError as err:
+            print(f"{image_filename}: {err}")
+            failed += 1
+
+    print(f"{created} processed, {skipped} already done, {failed} failed")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
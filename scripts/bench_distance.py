@@ -0,0 +1,75 @@
+"""Compare the scalar haversine loop with the NumPy distance kernel.
+
+Filters and ranks random seller locations around a buyer the way the
+catalog does, for 1k/10k/100k sellers by default:
+
+    python scripts/bench_distance.py --sizes 1000 10000 100000 --radius 25
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from services.geo import haversine, nearest_within
+
+# Manila, with sellers spread over roughly Luzon
+BUYER = (14.5995, 120.9842)
+SPREAD_DEG = 3.0
+
+
+def scalar(lats, lons, radius_km):
+    in_range = []
+    for index, (lat, lon) in enumerate(zip(lats, lons)):
+        dist = haversine(BUYER[0], BUYER[1], lat, lon)
+        if dist <= radius_km:
+            in_range.append((dist, index))
+    in_range.sort()
+    return [index for _, index in in_range]
+
+
+def vectorized(lats, lons, radius_km):
+    indices, _ = nearest_within(BUYER[0], BUYER[1], lats, lons, radius_km)
+    return indices.tolist()
+
+
+def best_of(repeat, function, *args):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--radius', type=float, default=25, help='km')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    print(f"{'sellers':>8} {'in range':>9} {'scalar ms':>10} {'numpy ms':>9} {'numpy Mpts/s':>13} {'speedup':>8}")
+    for size in args.sizes:
+        lats = [BUYER[0] + rng.uniform(-SPREAD_DEG, SPREAD_DEG) for _ in range(size)]
+        lons = [BUYER[1] + rng.uniform(-SPREAD_DEG, SPREAD_DEG) for _ in range(size)]
+        lat_array, lon_array = np.array(lats), np.array(lons)
+
+        scalar_time, expected = best_of(args.repeat, scalar, lats, lons, args.radius)
+        numpy_time, result = best_of(args.repeat, vectorized, lat_array, lon_array, args.radius)
+        if sorted(result) != sorted(expected):
+            print(f"result mismatch for {size} sellers")
+            return 1
+
+        print(f"{size:>8} {len(result):>9} {scalar_time * 1000:>10.2f} {numpy_time * 1000:>9.2f} "
+              f"{size / numpy_time / 1e6:>13.1f} {scalar_time / numpy_time:>7.1f}x")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,44 @@
+"""Delete old catalog_change rows so the change log stays small.
+
+Run from the project root every few minutes (e.g. from cron). Rows newer than
+--keep-seconds and the newest row of each entity are kept:
+
+    python scripts/prune_catalog_changes.py [--keep-seconds 3600]
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.db import get_db_connection
+from services.catalog_changes import CHANGE_RETENTION_SECONDS, prune_catalog_changes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--keep-seconds', type=int, default=CHANGE_RETENTION_SECONDS,
+                        help='age of the oldest rows kept; must be well above the catalog poll intervals')
+    args = parser.parse_args()
+
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    deleted = 0
+    try:
+        # small batches, each committed, so writers logging changes aren't held up
+        while True:
+            count = prune_catalog_changes(cursor, args.keep_seconds)
+            conn.commit()
+            deleted += count
+            if not count:
+                break
+    finally:
+        cursor.close()
+        conn.close()
+
+    print(f"{deleted} catalog changes deleted")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
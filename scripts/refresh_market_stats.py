@@ -0,0 +1,52 @@
+"""Recompute the marketplace top products shown on every seller dashboard.
+
+Run from the project root, once per refresh (e.g. every 5 minutes from cron),
+or keep it running with --every:
+
+    python scripts/refresh_market_stats.py [--every SECONDS]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.db import get_db_connection
+from services.market_stats import refresh_market_top_products
+
+
+def refresh():
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        count = refresh_market_top_products(cursor)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+        conn.close()
+    print(f"{count} top products stored")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--every', type=float, help='repeat every SECONDS instead of running once')
+    args = parser.parse_args()
+
+    if not args.every:
+        refresh()
+        return 0
+    while True:
+        try:
+            refresh()
+        except Exception as err:
+            # keep the last stored ranking and try again next time
+            print(f"refresh failed: {err}")
+        time.sleep(args.every)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
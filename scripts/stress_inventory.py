@@ -0,0 +1,132 @@
+"""Hammer one VariationID from many threads and check stock never oversells.
+
+Runs services.inventory.reserve_stock against a throwaway SQLite database
+that stands in for MySQL, next to the old SELECT-then-UPDATE approach for
+comparison:
+
+    python scripts/stress_inventory.py --threads 16 --stock 200 --attempts 40
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.inventory import InsufficientStock, reserve_stock
+
+VARIATION_ID = 'VT1000'
+
+
+class SQLiteCursor:
+    # translate the MySQL dialect used by services.inventory to SQLite
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def execute(self, query, params=()):
+        query = query.replace('%s', '?').replace('FOR UPDATE', '')
+        return self._cursor.execute(query, tuple(params))
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+class Counter(dict):
+    def __init__(self):
+        super().__init__(sold=0, rejected=0)
+        self._lock = threading.Lock()
+
+    def add(self, key):
+        with self._lock:
+            self[key] += 1
+
+
+def connect(path):
+    connection = sqlite3.connect(path, timeout=60, isolation_level=None)
+    connection.execute("PRAGMA journal_mode=WAL")
+    return connection
+
+
+def setup(path, stock):
+    connection = connect(path)
+    connection.execute("CREATE TABLE product_variation (VariationID TEXT PRIMARY KEY, Quantity INTEGER NOT NULL, Status TEXT)")
+    connection.execute("INSERT INTO product_variation VALUES (?, ?, 'in-stock')", (VARIATION_ID, stock))
+    connection.close()
+
+
+def atomic_worker(path, attempts, results):
+    connection = connect(path)
+    cursor = SQLiteCursor(connection.cursor())
+    for _ in range(attempts):
+        cursor.execute("BEGIN IMMEDIATE")
+        try:
+            reserve_stock(cursor, {VARIATION_ID: 1})
+            cursor.execute("COMMIT")
+            results.add('sold')
+        except InsufficientStock:
+            cursor.execute("ROLLBACK")
+            results.add('rejected')
+    connection.close()
+
+
+def read_modify_write_worker(path, attempts, results):
+    # what decrease_quantity used to do: read in one statement, write in another
+    connection = connect(path)
+    for _ in range(attempts):
+        current = connection.execute("SELECT Quantity FROM product_variation WHERE VariationID = ?", (VARIATION_ID,)).fetchone()[0]
+        if current < 1:
+            results.add('rejected')
+            continue
+        connection.execute("UPDATE product_variation SET Quantity = ? WHERE VariationID = ?", (current - 1, VARIATION_ID))
+        results.add('sold')
+    connection.close()
+
+
+def run(worker, threads, stock, attempts):
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'stress.db')
+        setup(path, stock)
+
+        results = Counter()
+        pool = [threading.Thread(target=worker, args=(path, attempts, results)) for _ in range(threads)]
+        for thread in pool:
+            thread.start()
+        for thread in pool:
+            thread.join()
+
+        connection = connect(path)
+        quantity, status = connection.execute("SELECT Quantity, Status FROM product_variation").fetchone()
+        connection.close()
+
+    return results['sold'], results['rejected'], quantity, status
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--stock', type=int, default=200)
+    parser.add_argument('--attempts', type=int, default=40, help='reservations per thread')
+    args = parser.parse_args()
+
+    demand = args.threads * args.attempts
+    print(f"{args.threads} threads x {args.attempts} attempts = {demand} units wanted, {args.stock} in stock")
+
+    ok = True
+    for name, worker in (('reserve_stock', atomic_worker), ('read-modify-write', read_modify_write_worker)):
+        sold, rejected, quantity, status = run(worker, args.threads, args.stock, args.attempts)
+        oversold = sold - (args.stock - quantity)
+        print(f"{name:>18}: sold={sold} rejected={rejected} left={quantity} status={status} oversold={oversold}")
+        if worker is atomic_worker:
+            expected = min(args.stock, demand)
+            ok = sold == expected and oversold == 0 and quantity == args.stock - expected
+            if quantity == 0:
+                ok = ok and status == 'restock'
+
+    print("reserve_stock:", "OK" if ok else "FAILED")
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
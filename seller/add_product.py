@@ -1,43 +1,24 @@
 from flask import Blueprint, render_template, request, redirect, session, jsonify
 import mysql.connector
+from database.db import get_db_connection
+from database.ids import next_id
+from services.catalog import products_changed
+from services.fragments import invalidate_product_cards
+from services.geo_index import geo_index
+from services.suggestions import suggestion_index
+from services.image_jobs import queue_missing_variants
+from services.image_store import store_image
+from services.reference import get_categories
 from werkzeug.utils import secure_filename
 from dotenv import load_dotenv
 import os
-import uuid
 
 load_dotenv()
 
 add_product_app = Blueprint('add_product', __name__)
 
-db_config = {
-    "host": os.getenv("AIVEN_HOST"),
-    "port": int(os.getenv("AIVEN_PORT", 19441)), 
-    "user": os.getenv("AIVEN_USER"),
-    "password": os.getenv("AIVEN_PASSWORD"),
-    "database": os.getenv("AIVEN_DATABASE"),
-    "use_pure": True                                  
-}
-
-def get_db_connection():
-    return mysql.connector.connect(**db_config)
-
 def generate_product_id():
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute(f"SELECT MAX(ProductID) FROM product")
-    latest_product_id = cursor.fetchone()[0]
-
-    if latest_product_id is not None:
-        numeric_part = int(latest_product_id[2:])
-        new_numeric_part = numeric_part + 1
-    else:
-        new_numeric_part = 1000
-
-    product_id = f"PD{new_numeric_part}"
-    cursor.close()
-    conn.close()
-
-    return product_id  
+    return next_id('product')
 
 class Product:
     VOLUMETRIC_FACTOR = 5000
@@ -58,22 +39,7 @@ class Product:
         self.variations.append(variation)
 
     def generate_variation_id(self):
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute(f"SELECT MAX(VariationID) FROM product_variation")
-        latest_variation_id = cursor.fetchone()[0]
-
-        if latest_variation_id is not None:
-            numeric_part = int(latest_variation_id[2:])
-            new_numeric_part = numeric_part + 1
-        else:
-            new_numeric_part = 1000
-
-        variation_id = f"VT{new_numeric_part}"
-        cursor.close()
-        conn.close()
-
-        return variation_id
+        return next_id('variation')
    
     def calculate_shipping_fee(self):
         actual_weight = float(self.weight)
@@ -92,16 +58,15 @@ class Product:
         values = (product_id, user_id, self.productname, self.weight, self.packaging_length, self.packaging_width, self.packaging_height, self.category_id, self.image, shipping_fee, address_id)
 
         try:
+            # one transaction: the product, its variations and its summary row
+            # and catalog_change entry are all written, or none of them
             cursor.execute(sql_query, values)
-            conn.commit()
 
-            self.product_id = product_id
-           
             for variation in self.variations:
                 cursor.execute("""
                 SELECT 1 FROM product_variation 
                 WHERE ProductID = %s AND Unit = %s AND Price = %s AND Quantity = %s
-            """, (self.product_id, variation.get('unit'), variation['price'], variation['quantity']))
+            """, (product_id, variation.get('unit'), variation['price'], variation['quantity']))
 
                 if cursor.fetchone():  
                     continue  
@@ -117,14 +82,23 @@ class Product:
 
                 variation_id = self.generate_variation_id()
                 variation_query = "INSERT INTO product_variation (VariationID, ProductID, Unit, Price, Quantity, Status) VALUES (%s, %s, %s, %s, %s, %s)"
-                variation_values = (variation_id, self.product_id, variation.get('unit', None), variation['price'], qty, status)
+                variation_values = (variation_id, product_id, variation.get('unit', None), variation['price'], qty, status)
                 cursor.execute(variation_query, variation_values)
-                conn.commit()
 
+            products_changed(cursor, [product_id])
+            conn.commit()
+            self.product_id = product_id
+            geo_index.mark_stale()
+            invalidate_product_cards([self.product_id])
+            suggestion_index.refresh_products(cursor, [self.product_id])
             return True
         except mysql.connector.Error as e:
             conn.rollback()
             return False
+        except Exception:
+            # e.g. a variation with an empty quantity: nothing of the product is kept
+            conn.rollback()
+            raise
         finally:
             cursor.close()
             conn.close()
@@ -146,13 +120,16 @@ def add_product():
         image = request.files['Image']
         image_filename = None
 
-        if image:
-            filename = secure_filename(image.filename)
-            unique_filename = f"{uuid.uuid4().hex}_{filename}"
-            image.save(os.path.join(app.config['UPLOAD_FOLDER'], unique_filename))
-            image_filename = unique_filename
-
         if productname and weight and packaging_length and packaging_width and packaging_height and category_id:
+            if image:
+                # on this request's connection, so the image row stays locked until
+                # insert_into_database commits the product that refers to it
+                conn = get_db_connection()
+                cursor = conn.cursor()
+                image_filename, _ = store_image(cursor, app.config['UPLOAD_FOLDER'], image)
+                cursor.close()
+                queue_missing_variants(app.config['UPLOAD_FOLDER'], image_filename)
+
             product = Product(productname, weight, packaging_length, packaging_width, packaging_height, category_id, image_filename)
 
             unit = request.form.getlist('Unit')
@@ -190,8 +167,7 @@ def add_product():
    
     conn = get_db_connection()
     cursor = conn.cursor()
-    cursor.execute("SELECT CategoryID, Category_Name FROM product_category")
-    categories = cursor.fetchall()
+    categories = [(category['CategoryID'], category['Category_Name']) for category in get_categories()]
 
     user_id = session.get('user_id')
     cursor.execute("""
@@ -1,5 +1,13 @@
 from flask import Blueprint, render_template, request, redirect, flash, session, url_for, jsonify
 import mysql.connector
+from database.db import get_db_connection
+from database.ids import next_id
+from services.catalog import products_changed
+from services.fragments import invalidate_product_cards
+from services.geo_index import geo_index
+from services.image_jobs import queue_missing_variants
+from services.image_store import release_image, store_image
+from services.suggestions import suggestion_index
 from werkzeug.utils import secure_filename
 from dotenv import load_dotenv
 import os
@@ -8,23 +16,10 @@ load_dotenv()
 
 homepage_seller_app = Blueprint('homepage_seller', __name__)
 
-db_config = {
-    "host": os.getenv("AIVEN_HOST"),
-    "port": int(os.getenv("AIVEN_PORT", 19441)),
-    "user": os.getenv("AIVEN_USER"),
-    "password": os.getenv("AIVEN_PASSWORD"),
-    "database": os.getenv("AIVEN_DATABASE"),
-    "use_pure": True
-}
-
 VOLUMETRIC_FACTOR = 5000
 SHIPPING_RATE_PER_UNIT_WEIGHT = 50
 
 
-def get_db_connection():
-    return mysql.connector.connect(**db_config)
-
-
 def calculate_shipping_fee(weight, length, width, height):
     volumetric_weight = (length * width * height) / VOLUMETRIC_FACTOR
     return max(float(weight), volumetric_weight) * SHIPPING_RATE_PER_UNIT_WEIGHT
@@ -85,17 +80,14 @@ def fetch_variations_for_product(product_id):
     return variations
 
 
-def update_product(product_id, product_name, weight, length, width, height, shipping_fee, image_filename):
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
-
+def update_product(cursor, product_id, product_name, weight, length, width, height, image_filename):
+    # returns the image the product had before, for release once the edit is committed
     cursor.execute("SELECT ImageFilename FROM product WHERE ProductID = %s", (product_id,))
-    prev_filename = cursor.fetchone()['ImageFilename']
+    prev_filename = cursor.fetchone()[0]
 
     shipping_fee = calculate_shipping_fee(weight, length, width, height)
 
     if image_filename:
-        delete_previous_image(prev_filename)
         sql = """UPDATE product 
                  SET Product_Name=%s, Weight=%s, Packaging_Length=%s, Packaging_Width=%s, 
                      Packaging_Height=%s, Shipping_Fee=%s, ImageFilename=%s 
@@ -109,60 +101,35 @@ def update_product(product_id, product_name, weight, length, width, height, ship
         values = (product_name, weight, length, width, height, shipping_fee, product_id)
 
     cursor.execute(sql, values)
-    conn.commit()
-    cursor.close()
-    conn.close()
+    return prev_filename
 
 
 def delete_previous_image(filename):
     from app import app
-    if filename:
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        if os.path.exists(filepath):
-            os.remove(filepath)
+    # the same file can back several products, so it only goes when the last one does
+    release_image(app.config['UPLOAD_FOLDER'], filename)
 
 
 # ---------- VARIATION HANDLERS ----------
+# These run in the caller's transaction; edit_product commits once at the end.
 
 def generate_variation_id():
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT MAX(VariationID) FROM product_variation")
-    latest = cursor.fetchone()[0]
-    new_id = f"VT{int(latest[2:]) + 1}" if latest else "VT1000"
-    cursor.close()
-    conn.close()
-    return new_id
+    return next_id('variation')
 
 
-def add_variation_to_product(product_id, unit, price, quantity):
-    conn = get_db_connection()
-    cursor = conn.cursor()
+def add_variation_to_product(cursor, product_id, unit, price, quantity):
     variation_id = generate_variation_id()
     cursor.execute("INSERT INTO product_variation (VariationID, ProductID, Unit, Price, Quantity) VALUES (%s,%s,%s,%s,%s)",
                    (variation_id, product_id, unit, price, quantity))
-    conn.commit()
-    cursor.close()
-    conn.close()
 
 
-def update_variation(variation_id, unit, price, quantity):
-    conn = get_db_connection()
-    cursor = conn.cursor()
+def update_variation(cursor, variation_id, unit, price, quantity):
     cursor.execute("UPDATE product_variation SET Unit=%s, Price=%s, Quantity=%s WHERE VariationID=%s",
                    (unit, price, quantity, variation_id))
-    conn.commit()
-    cursor.close()
-    conn.close()
 
 
-def delete_variation(variation_id):
-    conn = get_db_connection()
-    cursor = conn.cursor()
+def delete_variation(cursor, variation_id):
     cursor.execute("DELETE FROM product_variation WHERE VariationID=%s", (variation_id,))
-    conn.commit()
-    cursor.close()
-    conn.close()
 
 
 # ---------- ADDRESS & COUNT ----------
@@ -235,13 +202,18 @@ def delete_product(product_id):
     conn = get_db_connection()
     cursor = conn.cursor()
     cursor.execute("SELECT ImageFilename FROM product WHERE ProductID=%s", (product_id,))
-    image_filename = cursor.fetchone()[0] if cursor.fetchone() else None
+    row = cursor.fetchone()
+    image_filename = row[0] if row else None
 
     cursor.execute("DELETE FROM product_variation WHERE ProductID=%s", (product_id,))
     cursor.execute("DELETE FROM product WHERE ProductID=%s", (product_id,))
+    products_changed(cursor, [product_id])
     conn.commit()
+    suggestion_index.refresh_products(cursor, [product_id])
     cursor.close()
     conn.close()
+    geo_index.mark_stale()
+    invalidate_product_cards([product_id])
 
     delete_previous_image(image_filename)
 
@@ -271,34 +243,55 @@ def edit_product(product_id):
 
     image_file = request.files.get('Image')
     image_filename = None
-    if image_file and image_file.filename:
-        image_filename = secure_filename(image_file.filename)
-        image_file.save(os.path.join(app.config['UPLOAD_FOLDER'], image_filename))
-
-    update_product(product_id, product_name, weight, length, width, height, None, image_filename)
-
-    # Update existing variations
-    for var_id, unit, price, qty in zip(
-            request.form.getlist('existing_variations[]'),
-            request.form.getlist('unit[]'),
-            request.form.getlist('price[]'),
-            request.form.getlist('quantity[]')
-    ):
-        update_variation(var_id, unit, price, qty)
-
-    # Add new variations
-    for unit, price, qty in zip(
-            request.form.getlist('new_unit[]'),
-            request.form.getlist('new_price[]'),
-            request.form.getlist('new_quantity[]')
-    ):
-        add_variation_to_product(product_id, unit, price, qty)
-
-    # Delete variations if delete button pressed
-    variations = fetch_variations_for_product(product_id)
-    for variation in variations:
-        if f"delete_variation_button_{variation['VariationID']}" in request.form:
-            delete_variation(variation['VariationID'])
+
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        if image_file and image_file.filename:
+            # locks the image's row until the product pointing at it is committed
+            image_filename, _ = store_image(cursor, app.config['UPLOAD_FOLDER'], image_file)
+        prev_filename = update_product(cursor, product_id, product_name, weight, length, width, height, image_filename)
+
+        # Update existing variations
+        for var_id, unit, price, qty in zip(
+                request.form.getlist('existing_variations[]'),
+                request.form.getlist('unit[]'),
+                request.form.getlist('price[]'),
+                request.form.getlist('quantity[]')
+        ):
+            update_variation(cursor, var_id, unit, price, qty)
+
+        # Add new variations
+        for unit, price, qty in zip(
+                request.form.getlist('new_unit[]'),
+                request.form.getlist('new_price[]'),
+                request.form.getlist('new_quantity[]')
+        ):
+            add_variation_to_product(cursor, product_id, unit, price, qty)
+
+        # Delete variations if delete button pressed
+        cursor.execute("SELECT VariationID FROM product_variation WHERE ProductID = %s", (product_id,))
+        for (variation_id,) in cursor.fetchall():
+            if f"delete_variation_button_{variation_id}" in request.form:
+                delete_variation(cursor, variation_id)
+
+        # the summary row changes in the same transaction as the product and its variations
+        products_changed(cursor, [product_id])
+        conn.commit()
+        suggestion_index.refresh_products(cursor, [product_id])
+    except mysql.connector.Error:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+        conn.close()
+    geo_index.mark_stale()
+    invalidate_product_cards([product_id])
+
+    if image_filename:
+        queue_missing_variants(app.config['UPLOAD_FOLDER'], image_filename)
+        if image_filename != prev_filename:
+            delete_previous_image(prev_filename)
 
     return redirect(url_for('homepage_seller.edit_product', product_id=product_id))
 
@@ -312,9 +305,12 @@ def update_product_address(product_id, address_id):
     conn = get_db_connection()
     cursor = conn.cursor()
     cursor.execute("UPDATE product SET AddressID=%s WHERE ProductID=%s", (address_id, product_id))
+    products_changed(cursor, [product_id])
     conn.commit()
     cursor.close()
     conn.close()
+    geo_index.mark_stale()
+    invalidate_product_cards([product_id])
     return jsonify({"success": True})
 
 
@@ -1,5 +1,8 @@
 from flask import Blueprint, render_template, request, redirect, session, url_for, flash
 import mysql.connector
+from database.db import get_db_connection
+from database.ids import next_id
+from services.reference import get_payment_methods
 from dotenv import load_dotenv
 import os
 
@@ -7,37 +10,13 @@ load_dotenv()
 
 payment_options_app = Blueprint('payment_options', __name__)
 
-def get_db_connection():
-    return mysql.connector.connect(
-        host=os.getenv("AIVEN_HOST"),
-        port=os.getenv("AIVEN_PORT"),
-        user=os.getenv("AIVEN_USER"),
-        password=os.getenv("AIVEN_PASSWORD"),
-        database=os.getenv("AIVEN_DATABASE"),
-        use_pure=True
-    )
-
 class PaymentOptions:
     def __init__(self, payment_method, account_number):
         self.payment_method = payment_method
         self.account_number = account_number
 
     def generate_payment_options_id(self):
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT MAX(Payment_OptionsID) FROM payment_options")
-        latest_payment_options_id = cursor.fetchone()[0]
-
-        if latest_payment_options_id is not None:
-            numeric_part = int(latest_payment_options_id[2:])
-            new_numeric_part = numeric_part + 1
-        else:
-            new_numeric_part = 1000
-
-        payment_options_id = f"PO{new_numeric_part}"
-        cursor.close()
-        conn.close()
-        return payment_options_id
+        return next_id('seller_payment_option')
 
     def insert_into_database(self, user_id):
         conn = get_db_connection()
@@ -65,8 +44,7 @@ def payment_options():
     cursor = conn.cursor()
 
     # Fetch all payment methods
-    cursor.execute("SELECT * FROM methods_of_payment")
-    payment_methods = cursor.fetchall()
+    payment_methods = get_payment_methods()
 
     # Fetch active payment options
     cursor.execute("""
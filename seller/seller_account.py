@@ -1,22 +1,11 @@
 from flask import Blueprint, render_template, request, redirect, flash, session, url_for
 import mysql.connector
+from database.db import get_db_connection
 from datetime import datetime
 import os
 
 seller_account_app = Blueprint('seller_account', __name__)
 
-db_config = {
-    "host": os.getenv("AIVEN_HOST"),
-    "port": int(os.getenv("AIVEN_PORT", 19441)), 
-    "user": os.getenv("AIVEN_USER"),
-    "password": os.getenv("AIVEN_PASSWORD"),
-    "database": os.getenv("AIVEN_DATABASE"),
-    "use_pure": True                                  
-}
-
-def get_db_connection():
-    return mysql.connector.connect(**db_config)
-
 @seller_account_app.route('/seller_account', methods=['GET', 'POST'])
 def seller_account():
     seller_id = session.get('SellerID')
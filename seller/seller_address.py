@@ -1,21 +1,15 @@
 from flask import Blueprint, render_template, request, redirect, flash, session, url_for
 import mysql.connector
+from database.db import get_db_connection
+from database.ids import next_id
+from services.catalog import address_changed
+from services.geo_index import geo_index
 from datetime import datetime
 import os
+import logging
 
 seller_address_app = Blueprint('seller_address', __name__)
-
-db_config = {
-    "host": os.getenv("AIVEN_HOST"),
-    "port": int(os.getenv("AIVEN_PORT", 19441)), 
-    "user": os.getenv("AIVEN_USER"),
-    "password": os.getenv("AIVEN_PASSWORD"),
-    "database": os.getenv("AIVEN_DATABASE"),
-    "use_pure": True                                  
-}
-
-def get_db_connection():
-    return mysql.connector.connect(**db_config)
+logger = logging.getLogger(__name__)
 
 @seller_address_app.route('/seller_address')
 def seller_address():
@@ -76,19 +70,17 @@ def save_seller_address():
         cursor.execute(update_query, (full_name, phone_number, street, municipality, province,
                                       region, zip_code, latitude, longitude,
                                       address_id, seller_id))
+        if cursor.rowcount:
+            address_changed(cursor, address_id)
         conn.commit()
         cursor.close()
         conn.close()
+        geo_index.mark_stale()
 
         flash("Address updated successfully!")
         return redirect(url_for('seller_address.seller_address'))
 
-    cursor.execute("SELECT MAX(AddressID) FROM seller_addresses")
-    last_id = cursor.fetchone()[0]
-    if last_id:
-        new_id = f"SA{int(last_id[2:]) + 1:04d}"
-    else:
-        new_id = "SA1000"
+    new_id = next_id('seller_address')
 
     cursor.execute("SELECT COUNT(*) FROM seller_addresses WHERE SellerID=%s", (seller_id,))
     has_addresses = cursor.fetchone()[0]
@@ -104,9 +96,11 @@ def save_seller_address():
     cursor.execute(insert_query, (new_id, seller_id, full_name, phone_number, street,
                                   municipality, province, region, zip_code,
                                   latitude, longitude, is_default))
+    address_changed(cursor, new_id)
     conn.commit()
     cursor.close()
     conn.close()
+    geo_index.mark_stale()
 
     flash("Address saved successfully!")
     return redirect(url_for('seller_address.seller_address'))
@@ -136,14 +130,16 @@ def delete_seller_address(address_id):
                 "DELETE FROM seller_addresses WHERE AddressID = %s AND SellerID = %s",
                 (address_id, seller_id)
             )
+            address_changed(cursor, address_id)
             conn.commit()
             cursor.close()
             conn.close()
+            geo_index.mark_stale()
             flash("Address deleted successfully!")
             return redirect(url_for('seller_address.seller_address'))
 
     except Exception as e:
-        print(e)
+        logger.exception("Deleting address failed: %s", e)
         cursor.close()
         conn.close()
         flash("Something went wrong!")
@@ -177,7 +173,7 @@ def set_default_address():
         conn.commit()
     except Exception as e:
         conn.rollback()
-        print(e)
+        logger.exception("Setting default address failed: %s", e)
         return {"success": False, "error": str(e)}, 500
     finally:
         cursor.close()
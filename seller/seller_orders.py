@@ -1,500 +1,92 @@
-from flask import Blueprint, render_template, request, redirect, flash, session, url_for
+from flask import Blueprint, render_template, request, redirect, flash, session, url_for, jsonify
 import mysql.connector
+from database.db import get_db_connection
+from database.instrumentation import query_budget
+from services.orders import ORDER_CURSOR, cancel_order, get_orders
+from services.pagination import cursor_matches, decode_cursor, get_page_size
 from datetime import datetime
 from dotenv import load_dotenv
 import os
+import logging
 
 load_dotenv()
 
 seller_orders_app = Blueprint('seller_orders', __name__)
-
-db_config = {
-    "host": os.getenv("AIVEN_HOST"),
-    "port": int(os.getenv("AIVEN_PORT", 19441)),  
-    "user": os.getenv("AIVEN_USER"),
-    "password": os.getenv("AIVEN_PASSWORD"),
-    "database": os.getenv("AIVEN_DATABASE"),
-    "use_pure": True                              
+logger = logging.getLogger(__name__)
+
+ORDER_STATUSES = {
+    'unpaid': 'waiting for payment',
+    'to_ship': 'pending',
+    'shipping': 'shipping',
+    'delivered': 'delivered',
+    'cancelled': 'cancelled'
 }
 
-def get_db_connection():
-    return mysql.connector.connect(**db_config)
-
-def get_unpaid_orders_data(user_id, sort='recent'):
-    order_details = []
-
+def get_orders_data(user_id, order_type, sort='recent'):
     try:
-        with get_db_connection() as connection:
-            cursor = connection.cursor(dictionary=True)
-
-            if sort == 'old':
-                order_by = 'ASC'
-            else:
-                order_by = 'DESC'
-
-            query_orders = f"""
-            SELECT OrderID, ProductID, VariationID, Quantity, Total_Amount, Order_Date, Payment_OptionsID, Order_Date, AddressID
-            FROM seller_order
-            WHERE Order_Status = 'waiting for payment' AND SellerID = %s
-            ORDER BY Order_Date {order_by}
-            """
-            cursor.execute(query_orders, (user_id,))
-            orders = cursor.fetchall()
-           
-            for order in orders:
-                product_id = order['ProductID']
-                variation_id = order['VariationID']
-                order_date = order['Order_Date']
-                address_id = order.get('AddressID')
-                payment_optionsid = order.get('Payment_OptionsID')
-
-                query_product = """
-                SELECT Product_Name, ImageFileName, Shipping_Fee
-                FROM product
-                WHERE ProductID = %s
-                """
-                cursor.execute(query_product, (product_id,))
-                product_info = cursor.fetchone()
-
-                query_variation = """
-                SELECT Unit, Price
-                FROM product_variation
-                WHERE VariationID = %s
-                """
-                cursor.execute(query_variation, (variation_id,))
-                variation_info = cursor.fetchone()
-
-                buyer_address = ""
-                if address_id:
-                    cursor.execute("""
-                    SELECT Full_Name, Phone_Number, Street, Municipality, Province, Zip_Code
-                    FROM buyer_addresses
-                    WHERE AddressID = %s
-                    """, (address_id,))
-                    addr = cursor.fetchone()
-                    if addr:
-                        buyer_address = f"{addr['Full_Name']}, {addr['Phone_Number']}, {addr['Street']}, {addr['Municipality']}, {addr['Province']} {addr['Zip_Code']}"
-                
-                payment_opt = ""
-                if payment_optionsid:
-                    cursor.execute("""
-                    SELECT Payment_Method, Account_Number
-                    FROM buyer_payment_options
-                    WHERE Payment_OptionsID = %s
-                    """, (payment_optionsid,))
-                    payment = cursor.fetchone()
-                    if payment:
-                        payment_opt = f"{payment['Payment_Method']}, {payment['Account_Number']}"
-
-                order_detail = {
-                    'ImageFileName': product_info['ImageFileName'],
-                    'Product_Name': product_info['Product_Name'],
-                    'Shipping_Fee': product_info['Shipping_Fee'],
-                    'Unit': variation_info['Unit'],
-                    'Quantity': order['Quantity'],
-                    'OrderID': order['OrderID'],
-                    'Price': variation_info['Price'],
-                    'Total_Amount': order['Total_Amount'],
-                    'Order_Date': order['Order_Date'],
-                    'Buyer_Address': buyer_address,
-                    'Payment_Option': payment_opt
-                }
-                order_details.append(order_detail)
-
-            print(sort)
-            print("ORDER BY:", order_by)
-            print("Final Query:", query_orders)
-
+        return get_orders(ORDER_STATUSES[order_type], seller_id=user_id, sort=sort)
     except mysql.connector.Error as err:
-        print(f"Error: {err}")
-
-    return order_details
+        logger.error("Database error: %s", err)
+        return [], None
 
-@seller_orders_app.route('/unpaid_orders', methods=['POST','GET'])
-def unpaid_orders():
+def render_orders(order_type):
     user_id = session.get('user_id')
     if not user_id:
         return redirect('/login') 
     sort = request.args.get('sort', 'recent')
-    order_details = get_unpaid_orders_data(user_id, sort)
+    order_details, next_cursor = get_orders_data(user_id, order_type, sort)
 
-    order_type = 'unpaid'
-    return render_template('seller_orders.html', order_details=order_details, order_type=order_type)
+    return render_template('seller_orders.html', order_details=order_details, order_type=order_type,
+                           next_cursor=next_cursor)
 
-def get_to_ship_orders_data(user_id, sort='recent'):
-    order_details = []
-    
-
-    try:
-        with get_db_connection() as connection:
-            cursor = connection.cursor(dictionary=True)
-
-            if sort == 'old':
-                order_by = 'ASC'
-            else:
-                order_by = 'DESC'
-
-            query_orders = f"""
-            SELECT OrderID, ProductID, VariationID, Quantity, Total_Amount, Order_Date, Payment_OptionsID, Order_Date, AddressID
-            FROM seller_order
-            WHERE Order_Status = 'pending' AND SellerID = %s
-            ORDER BY Order_Date {order_by}
-            """
-            cursor.execute(query_orders, (user_id,))
-            orders = cursor.fetchall()
-           
-            for order in orders:
-                product_id = order['ProductID']
-                variation_id = order['VariationID']
-                order_date = order['Order_Date']
-                address_id = order.get('AddressID')
-                payment_optionsid = order.get('Payment_OptionsID')
-
-                query_product = """
-                SELECT Product_Name, ImageFileName, Shipping_Fee
-                FROM product
-                WHERE ProductID = %s
-                """
-                cursor.execute(query_product, (product_id,))
-                product_info = cursor.fetchone()
-
-                query_variation = """
-                SELECT Unit, Price
-                FROM product_variation
-                WHERE VariationID = %s
-                """
-                cursor.execute(query_variation, (variation_id,))
-                variation_info = cursor.fetchone()
-
-                buyer_address = ""
-                if address_id:
-                    cursor.execute("""
-                    SELECT Full_Name, Phone_Number, Street, Municipality, Province, Zip_Code
-                    FROM buyer_addresses
-                    WHERE AddressID = %s
-                    """, (address_id,))
-                    addr = cursor.fetchone()
-                    if addr:
-                        buyer_address = f"{addr['Full_Name']}, {addr['Phone_Number']}, {addr['Street']}, {addr['Municipality']}, {addr['Province']} {addr['Zip_Code']}"
-
-                payment_opt = ""
-                if payment_optionsid:
-                    cursor.execute("""
-                    SELECT Payment_Method, Account_Number
-                    FROM buyer_payment_options
-                    WHERE Payment_OptionsID = %s
-                    """, (payment_optionsid,))
-                    payment = cursor.fetchone()
-                    if payment:
-                        payment_opt = f"{payment['Payment_Method']}, {payment['Account_Number']}"
-
-                order_detail = {
-                    'ImageFileName': product_info['ImageFileName'],
-                    'Product_Name': product_info['Product_Name'],
-                    'Shipping_Fee': product_info['Shipping_Fee'],
-                    'Unit': variation_info['Unit'],
-                    'Quantity': order['Quantity'],
-                    'OrderID': order['OrderID'],
-                    'Price': variation_info['Price'],
-                    'Total_Amount': order['Total_Amount'],
-                    'Order_Date': order['Order_Date'],
-                    'Buyer_Address': buyer_address,
-                    'Payment_Option': payment_opt
-                }
-                order_details.append(order_detail)
-
-    except mysql.connector.Error as err:
-        print(f"Error: {err}")
+@seller_orders_app.route('/seller_orders/<order_type>/more', methods=['GET'])
+@query_budget(2)
+def more_orders(order_type):
+    user_id = session.get('user_id')
+    if not user_id:
+        return jsonify({"error": "Not logged in"}), 401
+    if order_type not in ORDER_STATUSES:
+        return jsonify({"error": "Unknown order type"}), 404
+    after = decode_cursor(request.args.get('after'))
+    if not cursor_matches(after, *ORDER_CURSOR):
+        return jsonify({"error": "Invalid cursor"}), 400
+
+    order_details, next_cursor = get_orders(ORDER_STATUSES[order_type], seller_id=user_id,
+                                            sort=request.args.get('sort', 'recent'), after=after,
+                                            limit=get_page_size(request.args.get('limit')))
+    html = render_template('partials/seller_order_cards.html', order_details=order_details, order_type=order_type)
+    return jsonify({"html": html, "next_cursor": next_cursor})
 
-    return order_details
+@seller_orders_app.route('/unpaid_orders', methods=['POST','GET'])
+@query_budget(2)
+def unpaid_orders():
+    return render_orders('unpaid')
 
 @seller_orders_app.route('/to_ship_orders', methods=['POST','GET'])
+@query_budget(2)
 def to_ship_orders():
-    user_id = session.get("user_id")
-    if not user_id:
-        return redirect('/login') 
-    sort = request.args.get('sort', 'recent')
-    order_details = get_to_ship_orders_data(user_id, sort)
-
-    order_type = 'to_ship'
-    return render_template('seller_orders.html', order_details=order_details, order_type=order_type)
+    return render_orders('to_ship')
 
 @seller_orders_app.route('/shipping_orders', methods=['POST','GET'])
+@query_budget(2)
 def shipping_orders():
-    user_id = session.get("user_id")
-    if not user_id:
-        return redirect('/login') 
-    order_details = []  
-    sort = request.args.get('sort', 'recent')
-
-    try:
-        with get_db_connection() as connection:
-            cursor = connection.cursor(dictionary=True)
-
-            order_by = 'ASC' if sort == 'old' else 'DESC'
-
-            query_orders = f"""
-            SELECT OrderID, ProductID, VariationID, Quantity, Total_Amount, Order_Date, Payment_OptionsID, Shipping_Date, Order_Date, AddressID
-            FROM seller_order
-            WHERE Order_Status = 'shipping' AND SellerID = %s
-            ORDER BY Order_Date {order_by}
-            """
-            cursor.execute(query_orders, (user_id,))
-            orders = cursor.fetchall()
-           
-            for order in orders:
-                product_id = order['ProductID']
-                variation_id = order['VariationID']
-                order_date = order['Order_Date']
-                address_id = order.get('AddressID')
-                payment_optionsid = order.get('Payment_OptionsID')
-
-                query_product = """
-                SELECT Product_Name, ImageFileName, Shipping_Fee
-                FROM product
-                WHERE ProductID = %s
-                """
-                cursor.execute(query_product, (product_id,))
-                product_info = cursor.fetchone()
-
-                query_variation = """
-                SELECT Unit, Price
-                FROM product_variation
-                WHERE VariationID = %s
-                """
-                cursor.execute(query_variation, (variation_id,))
-                variation_info = cursor.fetchone()
-
-                buyer_address = ""
-                if address_id:
-                    cursor.execute("""
-                    SELECT Full_Name, Phone_Number, Street, Municipality, Province, Zip_Code
-                    FROM buyer_addresses
-                    WHERE AddressID = %s
-                    """, (address_id,))
-                    addr = cursor.fetchone()
-                    if addr:
-                        buyer_address = f"{addr['Full_Name']}, {addr['Phone_Number']}, {addr['Street']}, {addr['Municipality']}, {addr['Province']} {addr['Zip_Code']}"
-
-                payment_opt = ""
-                if payment_optionsid:
-                    cursor.execute("""
-                    SELECT Payment_Method, Account_Number
-                    FROM buyer_payment_options
-                    WHERE Payment_OptionsID = %s
-                    """, (payment_optionsid,))
-                    payment = cursor.fetchone()
-                    if payment:
-                        payment_opt = f"{payment['Payment_Method']}, {payment['Account_Number']}"
-
-                order_detail = {
-                    'ImageFileName': product_info['ImageFileName'],
-                    'Product_Name': product_info['Product_Name'],
-                    'Shipping_Fee': product_info['Shipping_Fee'],
-                    'Unit': variation_info['Unit'],
-                    'Quantity': order['Quantity'],
-                    'OrderID': order['OrderID'],
-                    'Price': variation_info['Price'],
-                    'Total_Amount': order['Total_Amount'],
-                    'Shipping_Date': order['Shipping_Date'],
-                    'Order_Date': order['Order_Date'],
-                    'Buyer_Address': buyer_address,
-                    'Payment_Option': payment_opt
-                }
-                order_details.append(order_detail)
-
-    except mysql.connector.Error as err:
-        print(f"Error: {err}")
-
-    order_type = 'shipping'  
-    return render_template('seller_orders.html', order_details=order_details, order_type=order_type)
+    return render_orders('shipping')
 
 @seller_orders_app.route('/delivered_orders', methods=['POST','GET'])
+@query_budget(2)
 def delivered_orders():
-    user_id = session.get("user_id")
-    if not user_id:
-        return redirect('/login') 
-    order_details = []  
-    sort = request.args.get('sort', 'recent')
-
-    try:
-        with get_db_connection() as connection:
-            cursor = connection.cursor(dictionary=True)
-
-            order_by = 'ASC' if sort == 'old' else 'DESC'
-
-            query_orders = f"""
-            SELECT OrderID, ProductID, VariationID, Quantity, Total_Amount, Order_Date, Payment_OptionsID, Shipping_Date, Order_Date, AddressID
-            FROM seller_order
-            WHERE Order_Status = 'delivered' AND SellerID = %s
-            ORDER BY Order_Date {order_by}
-            """
-            cursor.execute(query_orders, (user_id,))
-            orders = cursor.fetchall()
-           
-            for order in orders:
-                product_id = order['ProductID']
-                variation_id = order['VariationID']
-                order_date = order['Order_Date']
-                address_id = order.get('AddressID')
-                payment_optionsid = order.get('Payment_OptionsID')
-
-                query_product = """
-                SELECT Product_Name, ImageFileName, Shipping_Fee
-                FROM product
-                WHERE ProductID = %s
-                """
-                cursor.execute(query_product, (product_id,))
-                product_info = cursor.fetchone()
-
-                query_variation = """
-                SELECT Unit, Price
-                FROM product_variation
-                WHERE VariationID = %s
-                """
-                cursor.execute(query_variation, (variation_id,))
-                variation_info = cursor.fetchone()
-
-                buyer_address = ""
-                if address_id:
-                    cursor.execute("""
-                    SELECT Full_Name, Phone_Number, Street, Municipality, Province, Zip_Code
-                    FROM buyer_addresses
-                    WHERE AddressID = %s
-                    """, (address_id,))
-                    addr = cursor.fetchone()
-                    if addr:
-                        buyer_address = f"{addr['Full_Name']}, {addr['Phone_Number']}, {addr['Street']}, {addr['Municipality']}, {addr['Province']} {addr['Zip_Code']}"
-
-                payment_opt = ""
-                if payment_optionsid:
-                    cursor.execute("""
-                    SELECT Payment_Method, Account_Number
-                    FROM buyer_payment_options
-                    WHERE Payment_OptionsID = %s
-                    """, (payment_optionsid,))
-                    payment = cursor.fetchone()
-                    if payment:
-                        payment_opt = f"{payment['Payment_Method']}, {payment['Account_Number']}"
-
-                order_detail = {
-                    'ImageFileName': product_info['ImageFileName'],
-                    'Product_Name': product_info['Product_Name'],
-                    'Shipping_Fee': product_info['Shipping_Fee'],
-                    'Unit': variation_info['Unit'],
-                    'Quantity': order['Quantity'],
-                    'OrderID': order['OrderID'],
-                    'Price': variation_info['Price'],
-                    'Total_Amount': order['Total_Amount'],
-                    'Shipping_Date': order['Shipping_Date'],
-                    'Order_Date': order['Order_Date'],
-                    'Buyer_Address': buyer_address,
-                    'Payment_Option': payment_opt
-                }
-                order_details.append(order_detail)
-
-    except mysql.connector.Error as err:
-        print(f"Error: {err}")
-
-    order_type = 'delivered'  
-    return render_template('seller_orders.html', order_details=order_details, order_type=order_type)
+    return render_orders('delivered')
 
 @seller_orders_app.route('/cancelled_orders', methods=['POST','GET'])
+@query_budget(2)
 def cancelled_orders():
-    user_id = session.get("user_id")
-    if not user_id:
-        return redirect('/login') 
-    order_details = []  
-    sort = request.args.get('sort', 'recent')
-
-    try:
-        with get_db_connection() as connection:
-            cursor = connection.cursor(dictionary=True)
-
-            order_by = 'ASC' if sort == 'old' else 'DESC'
-
-            query_orders = f"""
-            SELECT OrderID, ProductID, VariationID, Quantity, Total_Amount, Order_Date, Payment_OptionsID, Order_Date, AddressID
-            FROM seller_order
-            WHERE Order_Status = 'cancelled' AND SellerID = %s
-            ORDER BY Order_Date {order_by}
-            """
-            cursor.execute(query_orders, (user_id,))
-            orders = cursor.fetchall()
-           
-            for order in orders:
-                product_id = order['ProductID']
-                variation_id = order['VariationID']
-                order_date = order['Order_Date']
-                address_id = order.get('AddressID')
-                payment_optionsid = order.get('Payment_OptionsID')
-
-                query_product = """
-                SELECT Product_Name, ImageFileName, Shipping_Fee
-                FROM product
-                WHERE ProductID = %s
-                """
-                cursor.execute(query_product, (product_id,))
-                product_info = cursor.fetchone()
-
-                query_variation = """
-                SELECT Unit, Price
-                FROM product_variation
-                WHERE VariationID = %s
-                """
-                cursor.execute(query_variation, (variation_id,))
-                variation_info = cursor.fetchone()
-
-                buyer_address = ""
-                if address_id:
-                    cursor.execute("""
-                    SELECT Full_Name, Phone_Number, Street, Municipality, Province, Zip_Code
-                    FROM buyer_addresses
-                    WHERE AddressID = %s
-                    """, (address_id,))
-                    addr = cursor.fetchone()
-                    if addr:
-                        buyer_address = f"{addr['Full_Name']}, {addr['Phone_Number']}, {addr['Street']}, {addr['Municipality']}, {addr['Province']} {addr['Zip_Code']}"
-
-                payment_opt = ""
-                if payment_optionsid:
-                    cursor.execute("""
-                    SELECT Payment_Method, Account_Number
-                    FROM buyer_payment_options
-                    WHERE Payment_OptionsID = %s
-                    """, (payment_optionsid,))
-                    payment = cursor.fetchone()
-                    if payment:
-                        payment_opt = f"{payment['Payment_Method']}, {payment['Account_Number']}"
-
-                order_detail = {
-                    'ImageFileName': product_info['ImageFileName'],
-                    'Product_Name': product_info['Product_Name'],
-                    'Shipping_Fee': product_info['Shipping_Fee'],
-                    'Unit': variation_info['Unit'],
-                    'Quantity': order['Quantity'],
-                    'OrderID': order['OrderID'],
-                    'Price': variation_info['Price'],
-                    'Total_Amount': order['Total_Amount'],
-                    'Order_Date': order['Order_Date'],
-                    'Buyer_Address': buyer_address,
-                    'Payment_Option': payment_opt
-                }
-                order_details.append(order_detail)
-
-    except mysql.connector.Error as err:
-        print(f"Error: {err}")
-
-    order_type = 'cancelled'
-    return render_template('seller_orders.html', order_details=order_details, order_type=order_type)
+    return render_orders('cancelled')
 
 @seller_orders_app.route('/ship_now/<order_id>', methods=['POST', 'GET'])
 def ship_now(order_id):
     user_id = session.get("user_id")
     if not user_id:
         return redirect('/login') 
-   
-    order_details = get_to_ship_orders_data(user_id)
 
     try:
         with get_db_connection() as connection:
@@ -520,65 +112,24 @@ def ship_now(order_id):
             connection.commit()
 
     except mysql.connector.Error as err:
-        print(f"Error: {err}")
+        logger.error("Database error: %s", err)
 
     order_type = 'to_ship'
+    order_details, next_cursor = get_orders_data(user_id, order_type)
 
-    return render_template('seller_orders.html', order_details=order_details, order_type=order_type, refresh_page=True)
+    return render_template('seller_orders.html', order_details=order_details, order_type=order_type,
+                           next_cursor=next_cursor, refresh_page=True)
 
 @seller_orders_app.route('/cancel_unpaid_order/<order_id>', methods=['POST', 'GET'])
 def cancel_unpaid_order(order_id):
     user_id = session.get("user_id")
     if not user_id:
         return redirect('/login') 
-   
-    order_details = get_unpaid_orders_data(user_id)
 
     try:
-        with get_db_connection() as connection:
-            cursor = connection.cursor()
-
-            update_query = """
-            UPDATE buyer_order
-            SET Order_Status = 'cancelled'
-            WHERE OrderID = %s
-            """
-            cursor.execute(update_query, (order_id,))
-            connection.commit()
-
-            update_query = """
-            UPDATE seller_order
-            SET Order_Status = 'cancelled'
-            WHERE OrderID = %s
-            """
-            cursor.execute(update_query, (order_id,))
-            connection.commit()
-
-            get_variation_id_query = "SELECT VariationID FROM seller_order WHERE OrderID = %s"
-            cursor.execute(get_variation_id_query, (order_id,))
-            variation_id = cursor.fetchone()[0]
-
-            seller_order_quantity_query = "SELECT Quantity FROM seller_order WHERE OrderID = %s"
-            cursor.execute(seller_order_quantity_query, (order_id,))
-            sl_quantity = cursor.fetchone()[0]
-            print(sl_quantity)
-
-            product_variation_quantity_query = "SELECT Quantity FROM product_variation WHERE VariationID = %s"
-            cursor.execute(product_variation_quantity_query, (variation_id,))      
-            pv_quantity = cursor.fetchone()[0]
-            print(pv_quantity)
-
-            new_quantity = max(pv_quantity + sl_quantity, 0)
-            print(new_quantity)
-
-            update_query = "UPDATE product_variation SET Quantity = %s WHERE VariationID = %s"
-            cursor.execute(update_query, (new_quantity, variation_id))
-            connection.commit()
-
+        cancel_order(order_id, 'waiting for payment', seller_id=user_id)
     except mysql.connector.Error as err:
-        print(f"Error: {err}")
-
-    order_type = 'unpaid'
+        logger.error("Database error: %s", err)
 
     return redirect(url_for('seller_orders.unpaid_orders'))
 
@@ -587,53 +138,10 @@ def cancel_to_ship_order(order_id):
     user_id = session.get("user_id")
     if not user_id:
         return redirect('/login') 
-   
-    order_details = get_to_ship_orders_data(user_id)
 
     try:
-        with get_db_connection() as connection:
-            cursor = connection.cursor()
-
-            update_query = """
-            UPDATE buyer_order
-            SET Order_Status = 'cancelled'
-            WHERE OrderID = %s
-            """
-            cursor.execute(update_query, (order_id,))
-            connection.commit()
-
-            update_query = """
-            UPDATE seller_order
-            SET Order_Status = 'cancelled'
-            WHERE OrderID = %s
-            """
-            cursor.execute(update_query, (order_id,))
-            connection.commit()
-
-            get_variation_id_query = "SELECT VariationID FROM seller_order WHERE OrderID = %s"
-            cursor.execute(get_variation_id_query, (order_id,))
-            variation_id = cursor.fetchone()[0]
-
-            seller_order_quantity_query = "SELECT Quantity FROM seller_order WHERE OrderID = %s"
-            cursor.execute(seller_order_quantity_query, (order_id,))
-            sl_quantity = cursor.fetchone()[0]
-            print(sl_quantity)
-
-            product_variation_quantity_query = "SELECT Quantity FROM product_variation WHERE VariationID = %s"
-            cursor.execute(product_variation_quantity_query, (variation_id,))      
-            pv_quantity = cursor.fetchone()[0]
-            print(pv_quantity)
-
-            new_quantity = max(pv_quantity + sl_quantity, 0)
-            print(new_quantity)
-
-            update_query = "UPDATE product_variation SET Quantity = %s WHERE VariationID = %s"
-            cursor.execute(update_query, (new_quantity, variation_id))
-            connection.commit()
-
+        cancel_order(order_id, 'pending', seller_id=user_id)
     except mysql.connector.Error as err:
-        print(f"Error: {err}")
-
-    order_type = 'to_ship'
+        logger.error("Database error: %s", err)
 
     return redirect(url_for('seller_orders.to_ship_orders'))
\ No newline at end of file
@@ -0,0 +1,77 @@
+from flask import current_app, request, session
+import hashlib
+import os
+import re
+import threading
+
+# Fingerprinted URLs never change content, so browsers may keep them for a year
+IMMUTABLE = 'public, max-age=31536000, immutable'
+# Static files requested without a fingerprint (e.g. relative url() in CSS) are
+# kept but revalidated, which costs a 304 rather than the whole file
+REVALIDATE = 'public, no-cache'
+NO_STORE = 'no-store, no-cache, must-revalidate, max-age=0'
+
+# product uploads named by their sha256 (services/image_store.py) and their variants
+CONTENT_ADDRESSED = re.compile(r'^images/products/(variants/)?[0-9a-f]{64}(-\w+)?\.\w+$')
+
+_fingerprints = {}  # path -> (mtime, hash)
+_lock = threading.Lock()
+
+
+def fingerprint(filename):
+    """Short content hash of a file in the static folder, or None if it doesn't exist."""
+    path = os.path.join(current_app.static_folder, filename)
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return None
+
+    cached = _fingerprints.get(path)
+    if cached and cached[0] == mtime:
+        return cached[1]
+    with open(path, 'rb') as asset:
+        digest = hashlib.sha256(asset.read()).hexdigest()[:12]
+    with _lock:
+        _fingerprints[path] = (mtime, digest)
+    return digest
+
+
+def add_static_fingerprint(endpoint, values):
+    # url_for('static', filename=...) gains ?v=<content hash>, so a changed file gets a new URL
+    if endpoint != 'static' or 'v' in values:
+        return
+    filename = values.get('filename')
+    if not filename or CONTENT_ADDRESSED.match(filename):
+        return
+    digest = fingerprint(filename)
+    if digest:
+        values['v'] = digest
+
+
+def set_cache_headers(response):
+    if request.endpoint == 'static':
+        filename = (request.view_args or {}).get('filename', '')
+        version = request.args.get('v')
+        # only a file that was found is immutable; a 404 kept for a year would
+        # outlive the upload that later fills that name
+        if response.status_code not in (200, 304):
+            response.headers['Cache-Control'] = REVALIDATE
+        elif CONTENT_ADDRESSED.match(filename) or (version and version == fingerprint(filename)):
+            response.headers['Cache-Control'] = IMMUTABLE
+        else:
+            response.headers['Cache-Control'] = REVALIDATE
+        response.headers.pop('Expires', None)
+        return response
+
+    # signed-in pages must not be kept, so Back after logout can't show them;
+    # pages with an ETag set their own private, revalidate-every-time policy
+    if response.mimetype == 'text/html' and session.get('user_id') and not response.headers.get('ETag'):
+        response.headers['Cache-Control'] = NO_STORE
+        response.headers['Pragma'] = 'no-cache'
+        response.headers['Expires'] = '-1'
+    return response
+
+
+def init_assets(app):
+    app.url_defaults(add_static_fingerprint)
+    app.after_request(set_cache_headers)
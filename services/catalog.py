@@ -0,0 +1,119 @@
+from services.http_cache import make_etag
+from services.reference import get_categories
+
+SUMMARY_SELECT = """
+    SELECT p.ProductID, p.SellerID, p.Product_Name, p.ImageFileName, p.CategoryID, pc.Category_Name,
+           MIN(pv.Price), MAX(pv.Price), SUM(pv.Quantity),
+           sa.AddressID, sa.Latitude, sa.Longitude, sa.Municipality, sa.Province
+    FROM product p
+    JOIN product_category pc ON pc.CategoryID = p.CategoryID
+    JOIN product_variation pv ON pv.ProductID = p.ProductID
+    JOIN seller_addresses sa ON sa.AddressID = p.AddressID
+"""
+SUMMARY_GROUP_BY = """
+    GROUP BY p.ProductID, p.SellerID, p.Product_Name, p.ImageFileName, p.CategoryID, pc.Category_Name,
+             sa.AddressID, sa.Latitude, sa.Longitude, sa.Municipality, sa.Province
+"""
+SUMMARY_COLUMNS = """(ProductID, SellerID, Product_Name, ImageFileName, CategoryID, Category_Name,
+     Min_Price, Max_Price, Total_Stock,
+     AddressID, Latitude, Longitude, Municipality, Province)"""
+
+
+def record_catalog_change(cursor, entity, entity_ids):
+    """Log that seller addresses or products changed, in the caller's transaction.
+
+    entity is 'address', 'product' or 'stock'. Per-process caches of the
+    catalog (the geo index) poll catalog_change and reload only the rows
+    logged there, and its highest Change_ID is the catalog version (see
+    get_catalog_version()).
+    """
+    entity_ids = list(dict.fromkeys(entity_ids))
+    if not entity_ids:
+        return
+    # one multi-row INSERT, so a checkout of many items is still one round trip
+    placeholders = ', '.join(['(%s, %s)'] * len(entity_ids))
+    cursor.execute(f"INSERT INTO catalog_change (Entity, EntityID) VALUES {placeholders}",
+                   [value for entity_id in entity_ids for value in (entity, entity_id)])
+
+
+def refresh_product_summary(cursor, product_ids):
+    """Rebuild the product_summary rows of product_ids from the source tables.
+
+    Products without a variation or a seller address are not listed, so
+    they end up with no summary row.
+    """
+    product_ids = list(set(product_ids))
+    if not product_ids:
+        return
+    placeholders = ', '.join(['%s'] * len(product_ids))
+    cursor.execute(f"DELETE FROM product_summary WHERE ProductID IN ({placeholders})", tuple(product_ids))
+    cursor.execute(f"""
+        INSERT INTO product_summary {SUMMARY_COLUMNS}
+        {SUMMARY_SELECT}
+        WHERE p.ProductID IN ({placeholders})
+        {SUMMARY_GROUP_BY}
+    """, tuple(product_ids))
+
+
+def refresh_summary_stock(cursor, product_ids):
+    # checkout and cancellation only move stock, so only Total_Stock is redone
+    product_ids = list(set(product_ids))
+    if not product_ids:
+        return
+    placeholders = ', '.join(['%s'] * len(product_ids))
+    cursor.execute(f"""
+        UPDATE product_summary ps
+        SET ps.Total_Stock = (SELECT COALESCE(SUM(pv.Quantity), 0) FROM product_variation pv WHERE pv.ProductID = ps.ProductID)
+        WHERE ps.ProductID IN ({placeholders})
+    """, tuple(product_ids))
+    # stock shows on the product page, so it moves the catalog version too
+    record_catalog_change(cursor, 'stock', product_ids)
+
+
+def products_changed(cursor, product_ids):
+    # call before committing any write to product or product_variation rows
+    refresh_product_summary(cursor, product_ids)
+    record_catalog_change(cursor, 'product', product_ids)
+
+
+def address_changed(cursor, address_id):
+    # call before committing any write to a seller_addresses row
+    cursor.execute("""
+        UPDATE product_summary ps
+        JOIN seller_addresses sa ON sa.AddressID = ps.AddressID
+        SET ps.Latitude = sa.Latitude, ps.Longitude = sa.Longitude,
+            ps.Municipality = sa.Municipality, ps.Province = sa.Province
+        WHERE ps.AddressID = %s
+    """, (address_id,))
+    record_catalog_change(cursor, 'address', [address_id])
+
+
+def get_catalog_version(cursor, include_stock=True):
+    """Latest catalog_change id, read from the database so every worker agrees.
+
+    Product pages show stock and use every change. Catalog pages don't, so
+    with include_stock=False only 'product' and 'address' changes count, and checkouts don't invalidate every buyer's catalog.
+    """
+    if include_stock:
+        cursor.execute("SELECT COALESCE(MAX(Change_ID), 0) AS Version FROM catalog_change")
+    else:
+        # one index lookup per entity on idx_catalog_change_entity
+        cursor.execute("""
+            SELECT GREATEST(
+                COALESCE((SELECT MAX(Change_ID) FROM catalog_change WHERE Entity = 'product'), 0),
+                COALESCE((SELECT MAX(Change_ID) FROM catalog_change WHERE Entity = 'address'), 0)
+            ) AS Version
+        """)
+    row = cursor.fetchone()
+    return row['Version'] if isinstance(row, dict) else row[0]
+
+
+def catalog_etag(version, *parts):
+    """ETag for a catalog page: a catalog version plus whatever else the page shows.
+
+    parts should cover everything buyer-specific on the page (buyer, default
+    address, range, filters), so that an unchanged ETag means the page the
+    browser holds is still right.
+    """
+    categories = tuple(category['CategoryID'] for category in get_categories())
+    return make_etag(version, categories, *parts)
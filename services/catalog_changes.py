@@ -0,0 +1,98 @@
+# Changes are re-read this far back, since AUTO_INCREMENT ids can commit out of order
+CHANGE_OVERLAP = 100
+# Rows older than this are deleted by scripts/prune_catalog_changes.py. A cache
+# that hasn't polled for this long may have missed changes and reloads fully.
+CHANGE_RETENTION_SECONDS = 3600
+
+
+def read_high_water_mark(cursor):
+    # read before a full load, so nothing committed during the load is skipped
+    cursor.execute("SELECT COALESCE(MAX(Change_ID), 0) FROM catalog_change")
+    return cursor.fetchone()[0]
+
+
+class ChangeFollower:
+    """How far a per-process copy of the catalog has read catalog_change.
+
+    After a full load, reset() to the high-water mark read before it; then
+    fetch() the changes since, apply them and advance(). Changes near the
+    mark are seen more than once, so applying one must be idempotent.
+    fetch() returns None when rows the follower hasn't seen may have been
+    pruned, and the caller must load everything again.
+    """
+
+    def __init__(self, entities):
+        self.entities = tuple(entities)
+        self.last_change_id = 0
+        self._fetched_up_to = 0
+
+    def reset(self, change_id):
+        self.last_change_id = change_id
+
+    def fetch(self, cursor):
+        """Return [(Change_ID, Entity, EntityID)] of this follower's entities since it last advanced."""
+        cursor.execute("""
+            SELECT COALESCE((SELECT Pruned_Up_To FROM catalog_change_prune WHERE Prune_ID = 1), 0),
+                   COALESCE(MAX(Change_ID), 0)
+            FROM catalog_change
+        """)
+        pruned_up_to, newest = cursor.fetchone()
+        if self.last_change_id < pruned_up_to:
+            # rows after our mark may be gone
+            return None
+
+        placeholders = ', '.join(['%s'] * len(self.entities))
+        cursor.execute(f"""
+            SELECT Change_ID, Entity, EntityID
+            FROM catalog_change
+            WHERE Change_ID > %s AND Change_ID <= %s AND Entity IN ({placeholders})
+        """, (max(self.last_change_id - CHANGE_OVERLAP, 0), newest, *self.entities))
+        self._fetched_up_to = newest
+        return cursor.fetchall()
+
+    def advance(self, changes):
+        # up to the newest id seen, of any entity, so other entities' changes
+        # being pruned doesn't look like a gap
+        self.last_change_id = max(self.last_change_id, self._fetched_up_to,
+                                  max((change[0] for change in changes), default=0))
+
+    @staticmethod
+    def entity_ids(changes, entity):
+        return {entity_id for _, changed, entity_id in changes if changed == entity}
+
+
+def prune_catalog_changes(cursor, keep_seconds=CHANGE_RETENTION_SECONDS, batch_size=10000):
+    """Delete up to batch_size rows older than keep_seconds; returns how many went.
+
+    The newest row of each entity is always kept, since catalog versions are
+    read from the highest ids. The highest id deleted is recorded in
+    catalog_change_prune, so followers that hadn't read that far reload.
+    The caller commits.
+    """
+    cursor.execute("SELECT MAX(Change_ID) FROM catalog_change GROUP BY Entity")
+    newest = [row[0] for row in cursor.fetchall()]
+    if not newest:
+        return 0
+    placeholders = ', '.join(['%s'] * len(newest))
+    cursor.execute(f"""
+        SELECT MAX(Change_ID) FROM (
+            SELECT Change_ID FROM catalog_change
+            WHERE Changed_At < NOW() - INTERVAL %s SECOND AND Change_ID NOT IN ({placeholders})
+            ORDER BY Change_ID
+            LIMIT %s
+        ) batch
+    """, (int(keep_seconds), *newest, batch_size))
+    prune_to = cursor.fetchone()[0]
+    if prune_to is None:
+        return 0
+
+    # the mark is written in the same transaction as the delete
+    cursor.execute("""
+        INSERT INTO catalog_change_prune (Prune_ID, Pruned_Up_To) VALUES (1, %s)
+        ON DUPLICATE KEY UPDATE Pruned_Up_To = GREATEST(Pruned_Up_To, VALUES(Pruned_Up_To))
+    """, (prune_to,))
+    cursor.execute(f"""
+        DELETE FROM catalog_change
+        WHERE Change_ID <= %s AND Changed_At < NOW() - INTERVAL %s SECOND AND Change_ID NOT IN ({placeholders})
+    """, (prune_to, int(keep_seconds), *newest))
+    return cursor.rowcount
@@ -0,0 +1,91 @@
+from datetime import datetime, timedelta
+from database.db import get_db_connection
+from services.market_stats import get_market_top_products
+
+SALES_DAYS = 30
+TOP_LIMIT = 5
+
+
+def calculate_aov(total_revenue, total_orders):
+    if total_orders == 0:
+        return 0
+    return total_revenue / total_orders
+
+
+def get_seller_dashboard(seller_id):
+    """Compute everything the seller dashboard shows in four queries on one connection.
+
+    1. open order counts, in one conditional-aggregation pass over the
+       seller's orders, plus delivered totals from seller_variation_sales
+    2. revenue per day for the last SALES_DAYS days from seller_daily_sales
+       (the 7-day series is the tail of it)
+    3. the seller's top variations from seller_variation_sales
+    4. the marketplace's top products, as stored in market_top_products
+       by scripts/refresh_market_stats.py
+
+    Revenue comes from the sales rollups (services/sales.py), so it uses the
+    price paid at checkout.
+    """
+    conn = get_db_connection()
+    cursor = conn.cursor(dictionary=True)
+    try:
+        cursor.execute("""
+            SELECT
+                COALESCE(SUM(so.Order_Status = 'waiting for payment'), 0) AS pending_payments,
+                COALESCE(SUM(so.Order_Status = 'pending'), 0) AS to_ship,
+                COALESCE(SUM(so.Order_Status = 'shipping'), 0) AS shipping,
+                COALESCE(SUM(so.Order_Status = 'cancelled'), 0) AS cancelled,
+                (SELECT COALESCE(SUM(Orders), 0) FROM seller_variation_sales WHERE SellerID = %s) AS total_delivered_orders,
+                (SELECT COUNT(*) FROM seller_variation_sales WHERE SellerID = %s) AS total_sold_variations,
+                (SELECT COALESCE(SUM(Revenue), 0) FROM seller_variation_sales WHERE SellerID = %s) AS total_revenue
+            FROM seller_order so
+            WHERE so.SellerID = %s AND so.Order_Status <> 'delivered'
+        """, (seller_id, seller_id, seller_id, seller_id))
+        stats = cursor.fetchone()
+
+        today = datetime.now().date()
+        days = [today - timedelta(days=i) for i in range(SALES_DAYS - 1, -1, -1)]
+        cursor.execute("""
+            SELECT Sale_Date, Revenue
+            FROM seller_daily_sales
+            WHERE SellerID = %s AND Sale_Date >= %s
+        """, (seller_id, days[0].strftime('%Y-%m-%d')))
+        daily = {row['Sale_Date']: float(row['Revenue']) for row in cursor.fetchall()}
+
+        cursor.execute("""
+            SELECT pv.VariationID, pv.Unit, p.Product_Name, p.ImageFilename,
+                   svs.Units AS total_sold, svs.Revenue AS revenue
+            FROM seller_variation_sales svs
+            JOIN product_variation pv ON svs.VariationID = pv.VariationID
+            JOIN product p ON pv.ProductID = p.ProductID
+            WHERE svs.SellerID = %s
+            ORDER BY total_sold DESC
+            LIMIT %s
+        """, (seller_id, TOP_LIMIT))
+        top_products = cursor.fetchall()
+
+        market_top_products, market_top_refreshed_at = get_market_top_products(cursor)
+    finally:
+        cursor.close()
+        conn.close()
+
+    total_revenue = float(stats['total_revenue'])
+    total_delivered_orders = int(stats['total_delivered_orders'])
+    sales_last_30_days = {day.strftime('%m-%d'): daily.get(day, 0) for day in days}
+    sales_last_7_days = {day.strftime('%m-%d'): daily.get(day, 0) for day in days[-7:]}
+
+    return {
+        'total_revenue': total_revenue,
+        'total_sold_variations': stats['total_sold_variations'],
+        'total_delivered_orders': total_delivered_orders,
+        'average_order_value': calculate_aov(total_revenue, total_delivered_orders),
+        'pending_payments': int(stats['pending_payments']),
+        'to_ship': int(stats['to_ship']),
+        'shipping': int(stats['shipping']),
+        'cancelled': int(stats['cancelled']),
+        'top_products': top_products,
+        'sales_last_7_days': sales_last_7_days,
+        'sales_last_30_days': sales_last_30_days,
+        'market_top_products': market_top_products,
+        'market_top_refreshed_at': market_top_refreshed_at,
+    }
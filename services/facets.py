@@ -0,0 +1,57 @@
+from collections import OrderedDict
+from services.geo_index import geo_index
+import bisect
+import os
+import threading
+
+FACET_CACHE_SIZE = int(os.getenv("FACET_CACHE_SIZE", 1000))
+# Lower bounds of the price buckets, on a product's lowest variation price
+PRICE_EDGES = (0, 50, 100, 250, 500)
+
+_facets = OrderedDict()  # (lat, lon, radius_km) -> (version, facets)
+_lock = threading.Lock()
+
+
+def price_buckets(counts):
+    buckets = []
+    for index, low in enumerate(PRICE_EDGES):
+        high = PRICE_EDGES[index + 1] if index + 1 < len(PRICE_EDGES) else None
+        buckets.append({'low': low, 'high': high, 'count': counts[index]})
+    return buckets
+
+
+def count_facets(listings):
+    # one pass over the listings, tallying category and price bucket together
+    categories = {}
+    prices = [0] * len(PRICE_EDGES)
+    for category_id, min_price in listings:
+        categories[category_id] = categories.get(category_id, 0) + 1
+        prices[max(bisect.bisect_right(PRICE_EDGES, min_price) - 1, 0)] += 1
+    return {'total': len(listings), 'categories': categories, 'prices': price_buckets(prices)}
+
+
+def get_facets(version, lat=None, lon=None, radius_km=None):
+    """Product counts per category and per price bucket within radius_km of a location.
+
+    Counts come from the geo index, so no query is run, and are taken at the
+    buyer's own location, so they add up to the catalog page's filtered count.
+    They are kept per (location, radius) until the catalog version
+    (get_catalog_version() without stock, with the index caught up to it)
+    moves. With no location the whole catalog is counted.
+    """
+    located = lat is not None and lon is not None
+    key = (lat, lon, radius_km) if located else None
+    with _lock:
+        cached = _facets.get(key)
+        if cached and cached[0] == version:
+            _facets.move_to_end(key)
+            return cached[1]
+
+    facets = count_facets(geo_index.listings_within(lat, lon, radius_km))
+
+    with _lock:
+        _facets[key] = (version, facets)
+        _facets.move_to_end(key)
+        while len(_facets) > FACET_CACHE_SIZE:
+            _facets.popitem(last=False)
+    return facets
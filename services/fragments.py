@@ -0,0 +1,75 @@
+from collections import OrderedDict
+from flask import current_app, render_template
+from markupsafe import Markup
+from services.images import variants_ready
+import os
+import threading
+
+# Rendered product cards kept per process, least recently used dropped first
+CARD_CACHE_SIZE = int(os.getenv("PRODUCT_CARD_CACHE_SIZE", 5000))
+# Stands in for the buyer-specific distance inside a cached card
+DISTANCE_SLOT = '@@DISTANCE@@'
+# product_summary columns a card shows; a change to any of them is a new version.
+# Other workers' cached cards are only replaced through this, so it has to
+# list every product field partials/product_card.html uses.
+CARD_FIELDS = ('Product_Name', 'MinPrice', 'MaxPrice', 'ImageFileName', 'Municipality', 'Province')
+
+_cards = OrderedDict()  # (ProductID, has_distance) -> (version, html)
+_lock = threading.Lock()
+
+
+def card_version(product):
+    # whether the resized images exist changes the markup, so it is part of the version
+    image_filename = product['ImageFileName']
+    ready = bool(image_filename) and variants_ready(current_app.config['UPLOAD_FOLDER'], image_filename)
+    return tuple(str(product[field]) for field in CARD_FIELDS) + (ready,)
+
+
+def render_product_card(product):
+    has_distance = product.get('Distance') is not None
+    key = (product['ProductID'], has_distance)
+    version = card_version(product)
+
+    with _lock:
+        cached = _cards.get(key)
+        if cached and cached[0] == version:
+            _cards.move_to_end(key)
+            html = cached[1]
+        else:
+            html = None
+
+    if html is None:
+        card = dict(product, Distance=DISTANCE_SLOT if has_distance else None)
+        html = render_template('partials/product_card.html', product=card)
+        with _lock:
+            _cards[key] = (version, html)
+            _cards.move_to_end(key)
+            while len(_cards) > CARD_CACHE_SIZE:
+                _cards.popitem(last=False)
+
+    if has_distance:
+        html = html.replace(DISTANCE_SLOT, str(product['Distance']))
+    return html
+
+
+def render_product_cards(product_data):
+    """Catalog cards for product_data, from cached fragments where they are current.
+
+    A fragment is reused while its product's summary row (name, prices,
+    image, location) is unchanged; the buyer's distance is filled in per
+    request.
+    """
+    return Markup(''.join(render_product_card(product) for product in product_data))
+
+
+def invalidate_product_cards(product_ids):
+    # only this worker's cache; other workers replace their copy on its next
+    # render, since the card version covers every field the card shows
+    with _lock:
+        for product_id in product_ids:
+            _cards.pop((product_id, True), None)
+            _cards.pop((product_id, False), None)
+
+
+def init_fragments(app):
+    app.add_template_global(render_product_cards)
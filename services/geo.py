@@ -0,0 +1,53 @@
+import math
+import numpy as np
+
+EARTH_RADIUS_KM = 6371
+
+
+def haversine(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(math.radians, [lat1, lon1, lat2, lon2])
+    dlat = lat2 - lat1
+    dlon = lon2 - lon1
+    a = math.sin(dlat/2)**2 + math.cos(lat1)*math.cos(lat2)*math.sin(dlon/2)**2
+    c = 2 * math.asin(math.sqrt(a))
+    return EARTH_RADIUS_KM * c
+
+
+def bounding_box(lat, lon, radius_km):
+    """Return (min_lat, max_lat, min_lon, max_lon) enclosing radius_km around a point.
+
+    The box is a cheap, index-friendly superset of the circle: everything in
+    range is inside it, so only the rows it matches need an exact distance.
+    """
+    angular_radius = radius_km / EARTH_RADIUS_KM
+    lat_delta = math.degrees(angular_radius)
+    min_lat, max_lat = lat - lat_delta, lat + lat_delta
+
+    # a circle that reaches a pole spans every longitude
+    if min_lat <= -90 or max_lat >= 90:
+        return max(min_lat, -90), min(max_lat, 90), -180, 180
+
+    lon_delta = math.degrees(math.asin(min(1, math.sin(angular_radius) / math.cos(math.radians(lat)))))
+    min_lon, max_lon = lon - lon_delta, lon + lon_delta
+
+    # rather than splitting the box at the antimeridian, widen it
+    if min_lon < -180 or max_lon > 180:
+        return min_lat, max_lat, -180, 180
+    return min_lat, max_lat, min_lon, max_lon
+
+
+def distances_km(lat, lon, lats, lons):
+    """Great-circle distances from one point to arrays of points, in one NumPy pass."""
+    lat1, lon1 = math.radians(lat), math.radians(lon)
+    lats = np.radians(np.asarray(lats, dtype=float))
+    lons = np.radians(np.asarray(lons, dtype=float))
+    a = np.sin((lats - lat1) / 2)**2 + math.cos(lat1) * np.cos(lats) * np.sin((lons - lon1) / 2)**2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1)))
+
+
+def nearest_within(lat, lon, lats, lons, radius_km):
+    """Return (indices, distances) of the points within radius_km, nearest first."""
+    distances = distances_km(lat, lon, lats, lons)
+    indices = np.flatnonzero(distances <= radius_km)
+    indices = indices[np.argsort(distances[indices], kind='stable')]
+    return indices, distances[indices]
@@ -0,0 +1,195 @@
+from database.db import get_db_connection
+from services.catalog_changes import ChangeFollower, read_high_water_mark
+from services.geo import bounding_box, nearest_within
+import math
+import os
+import threading
+import time
+
+# Grid cell edge in degrees (0.1 deg of latitude is about 11 km)
+CELL_SIZE_DEG = float(os.getenv("GEO_INDEX_CELL_DEG", 0.1))
+# Seconds between checks of catalog_change for rows edited by other workers
+POLL_INTERVAL = float(os.getenv("GEO_INDEX_POLL_SECONDS", 2))
+
+
+def cell_of(lat, lon):
+    return math.floor(lat / CELL_SIZE_DEG), math.floor(lon / CELL_SIZE_DEG)
+
+
+class GeoIndex:
+    """Seller addresses bucketed into a lat/lon grid, with the products at each.
+
+    Each worker keeps its own copy, loaded on first use and then kept current
+    by re-reading only the addresses and products logged in catalog_change.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pid = None
+        self._changes = ChangeFollower(('address', 'product'))
+        self._next_poll = 0
+        self.addresses = {}          # AddressID -> (lat, lon)
+        self.cells = {}              # (row, col) -> {AddressID}
+        self.products = {}           # ProductID -> (AddressID, CategoryID, MinPrice)
+        self.address_products = {}   # AddressID -> {ProductID}
+
+    def products_within(self, lat, lon, radius_km, category_id=None):
+        """Return [(ProductID, distance_km)] for listed products within radius_km, nearest first."""
+        with self._lock:
+            self._refresh()
+            return [(product_id, dist) for product_id, dist in self._within(lat, lon, radius_km)
+                    if category_id is None or self.products[product_id][1] == category_id]
+
+    def listings_within(self, lat, lon, radius_km):
+        """Return [(CategoryID, MinPrice)] for listed products within radius_km.
+
+        With no location every listed product is returned.
+        """
+        with self._lock:
+            self._refresh()
+            if lat is None or lon is None:
+                product_ids = list(self.products)
+            else:
+                product_ids = [product_id for product_id, _ in self._within(lat, lon, radius_km)]
+            return [self.products[product_id][1:] for product_id in product_ids]
+
+    def _within(self, lat, lon, radius_km):
+        min_lat, max_lat, min_lon, max_lon = bounding_box(lat, lon, radius_km)
+        min_row, min_col = cell_of(min_lat, min_lon)
+        max_row, max_col = cell_of(max_lat, max_lon)
+        if (max_row - min_row + 1) * (max_col - min_col + 1) > len(self.cells):
+            cells = [cell for cell in self.cells
+                     if min_row <= cell[0] <= max_row and min_col <= cell[1] <= max_col]
+        else:
+            cells = [(row, col) for row in range(min_row, max_row + 1) for col in range(min_col, max_col + 1)]
+
+        address_ids = [address_id for cell in cells for address_id in self.cells.get(cell, ())
+                       if address_id in self.address_products]
+        if not address_ids:
+            return []
+        coordinates = [self.addresses[address_id] for address_id in address_ids]
+        indices, distances = nearest_within(lat, lon, [c[0] for c in coordinates], [c[1] for c in coordinates],
+                                            radius_km)
+
+        in_range = []
+        for index, dist in zip(indices.tolist(), distances.tolist()):
+            for product_id in self.address_products[address_ids[index]]:
+                in_range.append((product_id, dist))
+        return in_range
+
+    def catch_up(self, version):
+        """Apply catalog changes up to at least version, from get_catalog_version().
+
+        A page whose ETag carries that version must not be built from an
+        index that hasn't seen it yet, so this polls early when behind.
+        """
+        with self._lock:
+            self._refresh()
+            if self._changes.last_change_id < version:
+                self._apply_changes()
+
+    def mark_stale(self):
+        # the next lookup in this worker picks up the change right away
+        self._next_poll = 0
+
+    def _refresh(self):
+        if self._pid != os.getpid():
+            self._load_all()
+        elif time.monotonic() >= self._next_poll:
+            self._apply_changes()
+
+    def _load_all(self):
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        try:
+            last_change_id = read_high_water_mark(cursor)
+
+            self.addresses, self.cells, self.products, self.address_products = {}, {}, {}, {}
+            cursor.execute("SELECT AddressID, Latitude, Longitude FROM seller_addresses")
+            for address_id, lat, lon in cursor.fetchall():
+                self._put_address(address_id, lat, lon)
+            cursor.execute("SELECT ProductID, AddressID, CategoryID, Min_Price FROM product_summary")
+            for product_id, address_id, category_id, min_price in cursor.fetchall():
+                self._put_product(product_id, address_id, category_id, min_price)
+        finally:
+            cursor.close()
+            conn.close()
+
+        self._pid = os.getpid()
+        self._changes.reset(last_change_id)
+        self._next_poll = time.monotonic() + POLL_INTERVAL
+
+    def _apply_changes(self):
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        try:
+            changes = self._changes.fetch(cursor)
+            if changes is None:
+                self._load_all()
+                return
+            address_ids = ChangeFollower.entity_ids(changes, 'address')
+            product_ids = ChangeFollower.entity_ids(changes, 'product')
+            if address_ids:
+                self._reload_addresses(cursor, address_ids)
+            if product_ids:
+                self._reload_products(cursor, product_ids)
+        finally:
+            cursor.close()
+            conn.close()
+
+        self._changes.advance(changes)
+        self._next_poll = time.monotonic() + POLL_INTERVAL
+
+    def _reload_addresses(self, cursor, address_ids):
+        placeholders = ', '.join(['%s'] * len(address_ids))
+        cursor.execute(f"SELECT AddressID, Latitude, Longitude FROM seller_addresses WHERE AddressID IN ({placeholders})",
+                       tuple(address_ids))
+        found = {row[0]: row for row in cursor.fetchall()}
+        for address_id in address_ids:
+            self._drop_address(address_id)
+            if address_id in found:
+                _, lat, lon = found[address_id]
+                self._put_address(address_id, lat, lon)
+
+    def _reload_products(self, cursor, product_ids):
+        placeholders = ', '.join(['%s'] * len(product_ids))
+        cursor.execute(f"SELECT ProductID, AddressID, CategoryID, Min_Price FROM product_summary WHERE ProductID IN ({placeholders})",
+                       tuple(product_ids))
+        found = {row[0]: row for row in cursor.fetchall()}
+        for product_id in product_ids:
+            self._drop_product(product_id)
+            if product_id in found:
+                _, address_id, category_id, min_price = found[product_id]
+                self._put_product(product_id, address_id, category_id, min_price)
+
+    def _put_address(self, address_id, lat, lon):
+        if lat is None or lon is None:
+            return
+        lat, lon = float(lat), float(lon)
+        self.addresses[address_id] = (lat, lon)
+        self.cells.setdefault(cell_of(lat, lon), set()).add(address_id)
+
+    def _drop_address(self, address_id):
+        location = self.addresses.pop(address_id, None)
+        if location is None:
+            return
+        cell = cell_of(*location)
+        self.cells[cell].discard(address_id)
+        if not self.cells[cell]:
+            del self.cells[cell]
+
+    def _put_product(self, product_id, address_id, category_id, min_price):
+        self.products[product_id] = (address_id, category_id, float(min_price))
+        self.address_products.setdefault(address_id, set()).add(product_id)
+
+    def _drop_product(self, product_id):
+        entry = self.products.pop(product_id, None)
+        if entry is None:
+            return
+        address_id = entry[0]
+        self.address_products[address_id].discard(product_id)
+        if not self.address_products[address_id]:
+            del self.address_products[address_id]
+
+
+geo_index = GeoIndex()
@@ -0,0 +1,28 @@
+from flask import make_response, request
+import hashlib
+
+# Pages answered with an ETag are kept by the browser but checked on every use
+REVALIDATE_PRIVATE = 'private, no-cache'
+
+
+def make_etag(*parts):
+    return hashlib.sha256('|'.join(map(str, parts)).encode()).hexdigest()[:32]
+
+
+def is_fresh(etag):
+    # the client's If-None-Match already names this version of the page
+    return request.if_none_match.contains(etag)
+
+
+def not_modified(etag):
+    response = make_response('', 304)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = REVALIDATE_PRIVATE
+    return response
+
+
+def with_etag(body, etag):
+    response = make_response(body)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = REVALIDATE_PRIVATE
+    return response
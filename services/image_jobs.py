@@ -0,0 +1,77 @@
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from services.images import create_variants, has_variants, mark_variants_ready
+import logging
+import multiprocessing
+import os
+import threading
+
+# Processes resizing uploads for each gunicorn worker
+IMAGE_WORKERS = int(os.getenv("IMAGE_WORKERS", 1))
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_pid = None
+_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor, _executor_pid
+
+    # like the DB pool, a pool inherited through gunicorn's fork is unusable,
+    # so each worker builds its own on first use
+    pid = os.getpid()
+    if _executor is None or _executor_pid != pid:
+        with _lock:
+            if _executor is None or _executor_pid != pid:
+                # spawn rather than fork: the worker already runs the log and suggestion
+                # threads. Spawned children re-import app.py, so its setup must not
+                # start anything there (see init_suggestions)
+                _executor = ProcessPoolExecutor(max_workers=IMAGE_WORKERS,
+                                                mp_context=multiprocessing.get_context('spawn'))
+                _executor_pid = pid
+    return _executor
+
+
+def _reset_executor():
+    global _executor
+    with _lock:
+        _executor = None
+
+
+def _job_done(future, image_filename):
+    error = future.exception()
+    if error is None:
+        # cards and pages in this worker switch to the variants right away
+        mark_variants_ready(image_filename)
+    else:
+        logger.error("Creating image variants failed for %s: %s", image_filename, error)
+    if isinstance(error, BrokenProcessPool):
+        # a crashed worker (e.g. out of memory on a huge image) breaks the whole pool
+        _reset_executor()
+
+
+def queue_variants(upload_folder, image_filename):
+    """Create the variants of a freshly saved upload in a separate process.
+
+    The request returns right away; templates show the original image until
+    the variants are written. A failed job is logged, and
+    scripts/backfill_images.py picks up anything that was missed.
+    """
+    mark_variants_ready(image_filename, False)
+    try:
+        future = get_executor().submit(create_variants, upload_folder, image_filename)
+    except (BrokenProcessPool, RuntimeError) as err:
+        logger.error("Image worker pool unavailable, %s keeps its original only: %s", image_filename, err)
+        _reset_executor()
+        return None
+    future.add_done_callback(lambda done: _job_done(done, image_filename))
+    return future
+
+
+def queue_missing_variants(upload_folder, image_filename):
+    # a new upload, or a stored one whose earlier job failed or was lost
+    if has_variants(upload_folder, image_filename):
+        return None
+    return queue_variants(upload_folder, image_filename)
@@ -0,0 +1,99 @@
+from database.db import get_db_connection
+from services.images import delete_variants
+from PIL import Image, UnidentifiedImageError
+from werkzeug.utils import secure_filename
+import hashlib
+import io
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+EXTENSIONS = {'JPEG': '.jpg', 'PNG': '.png', 'WEBP': '.webp', 'GIF': '.gif'}
+
+
+def content_filename(data, upload_name):
+    # the file's sha256, with an extension from the image's actual format where Pillow knows it
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            ext = EXTENSIONS.get(image.format)
+    except UnidentifiedImageError:
+        ext = None
+    if ext is None:
+        ext = os.path.splitext(secure_filename(upload_name or ''))[1].lower()
+    return hashlib.sha256(data).hexdigest() + ext
+
+
+def claim_image(cursor, image_filename):
+    # creates the image's row if needed and locks it until the caller's transaction ends
+    cursor.execute("INSERT INTO product_image (ImageFilename) VALUES (%s) "
+                   "ON DUPLICATE KEY UPDATE ImageFilename = ImageFilename", (image_filename,))
+    cursor.execute("SELECT ImageFilename FROM product_image WHERE ImageFilename = %s FOR UPDATE", (image_filename,))
+    cursor.fetchone()
+
+
+def store_image(cursor, upload_folder, file_storage):
+    """Save an upload under its content hash and return (image_filename, is_new).
+
+    Call inside the transaction that writes the product row referring to the
+    image: the image's product_image row stays locked until it commits, so
+    release_image() can't delete the file in between. Identical uploads
+    share one file, so is_new is False when the image was already stored.
+    Stored files never change, which keeps their URLs safe to cache forever.
+    """
+    data = file_storage.read()
+    image_filename = content_filename(data, file_storage.filename)
+    claim_image(cursor, image_filename)
+
+    path = os.path.join(upload_folder, image_filename)
+    if os.path.exists(path):
+        return image_filename, False
+
+    with open(path + '.tmp', 'wb') as output:
+        output.write(data)
+    os.replace(path + '.tmp', path)
+    return image_filename, True
+
+
+def count_image_references(cursor, image_filename):
+    cursor.execute("SELECT COUNT(*) FROM product WHERE ImageFilename = %s", (image_filename,))
+    return cursor.fetchone()[0]
+
+
+def release_image(upload_folder, image_filename):
+    """Delete an image and its variants once no product refers to it any more.
+
+    Call after the transaction that removed or replaced the reference has
+    committed. The references are counted and the files deleted while the
+    image's product_image row is locked, so an upload of the same image
+    either waits and writes the file again, or is counted. Shared files
+    (deduplicated uploads) are kept.
+    """
+    if not image_filename:
+        return False
+
+    # its own transaction, committed here rather than with the request's work
+    conn = get_db_connection(request_scoped=False)
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT ImageFilename FROM product_image WHERE ImageFilename = %s FOR UPDATE", (image_filename,))
+        cursor.fetchone()
+        if count_image_references(cursor, image_filename):
+            conn.rollback()
+            return False
+
+        cursor.execute("DELETE FROM product_image WHERE ImageFilename = %s", (image_filename,))
+        # the files go before the commit, while uploads of this image are still held back
+        path = os.path.join(upload_folder, image_filename)
+        if os.path.exists(path):
+            os.remove(path)
+        delete_variants(upload_folder, image_filename)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+        conn.close()
+    logger.debug("Deleted unreferenced image %s", image_filename)
+    return True
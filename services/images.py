@@ -0,0 +1,133 @@
+from flask import current_app, url_for
+from PIL import Image, ImageOps
+import os
+import time
+
+# Resized copies made of every product image: name -> width in pixels
+VARIANTS = {'thumb': 320, 'large': 960}
+FORMATS = {'webp': 'WEBP', 'jpg': 'JPEG'}
+VARIANT_DIR = 'variants'
+QUALITY = 80
+# what transparent areas become, since JPEG has no alpha and the variants drop it
+BACKGROUND = (255, 255, 255)
+# Seconds before an image found without variants is looked for on disk again
+VARIANT_RECHECK_SECONDS = float(os.getenv("VARIANT_RECHECK_SECONDS", 30))
+
+_ready = {}  # image_filename -> True, or when to look on disk again
+
+
+def variant_filename(image_filename, variant, ext):
+    # relative to the upload folder, e.g. variants/<stem>-thumb.webp
+    stem = os.path.splitext(image_filename)[0]
+    return f"{VARIANT_DIR}/{stem}-{variant}.{ext}"
+
+
+def variant_paths(upload_folder, image_filename):
+    return [os.path.join(upload_folder, variant_filename(image_filename, variant, ext))
+            for variant in VARIANTS for ext in FORMATS]
+
+
+def flatten(image):
+    # RGBA, LA and palette images with transparency go onto a white background
+    # rather than letting convert('RGB') turn their transparent areas black
+    if image.mode in ('RGBA', 'LA', 'PA') or (image.mode == 'P' and 'transparency' in image.info):
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, BACKGROUND)
+        background.paste(image, mask=image.getchannel('A'))
+        return background
+    return image.convert('RGB')
+
+
+def create_variants(upload_folder, image_filename):
+    """Write every size and format of an uploaded image, without its EXIF or other metadata.
+
+    Images narrower than a variant are not enlarged. Returns the paths written.
+    """
+    os.makedirs(os.path.join(upload_folder, VARIANT_DIR), exist_ok=True)
+    with Image.open(os.path.join(upload_folder, image_filename)) as original:
+        # apply the camera's rotation before the orientation tag is dropped
+        image = flatten(ImageOps.exif_transpose(original))
+
+    written = []
+    for variant, width in VARIANTS.items():
+        resized = image.copy()
+        resized.thumbnail((width, width * 4), Image.LANCZOS)
+        for ext, format_name in FORMATS.items():
+            path = os.path.join(upload_folder, variant_filename(image_filename, variant, ext))
+            options = {'quality': QUALITY}
+            if format_name == 'JPEG':
+                options.update(optimize=True, progressive=True)
+            else:
+                options.update(method=4)
+            # save to a temporary name first so a half-written file is never served;
+            # the pid keeps two jobs for the same upload from sharing it
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            resized.save(tmp_path, format_name, **options)
+            os.replace(tmp_path, path)
+            written.append(path)
+    return written
+
+
+def has_variants(upload_folder, image_filename):
+    return all(os.path.exists(path) for path in variant_paths(upload_folder, image_filename))
+
+
+def variants_ready(upload_folder, image_filename):
+    """Whether image_filename has every variant, from this process's memory where it can.
+
+    An image found ready stays ready until delete_variants(); one that isn't
+    is looked for on disk again after VARIANT_RECHECK_SECONDS, which is how
+    jobs run by other workers or scripts/backfill_images.py are noticed.
+    """
+    state = _ready.get(image_filename)
+    if state is True:
+        return True
+    now = time.monotonic()
+    if state is not None and now < state:
+        return False
+    if has_variants(upload_folder, image_filename):
+        _ready[image_filename] = True
+        return True
+    _ready[image_filename] = now + VARIANT_RECHECK_SECONDS
+    return False
+
+
+def mark_variants_ready(image_filename, ready=True):
+    # set by the image job in the worker that queued it; False makes the next look go to disk
+    if ready:
+        _ready[image_filename] = True
+    else:
+        _ready.pop(image_filename, None)
+
+
+def delete_variants(upload_folder, image_filename):
+    mark_variants_ready(image_filename, False)
+    for path in variant_paths(upload_folder, image_filename):
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def product_image(image_filename):
+    """Return the URLs a template needs to show a product image at the right size.
+
+    Until the variants of an image exist, every URL points at the original.
+    """
+    upload_folder = current_app.config['UPLOAD_FOLDER']
+    if not image_filename or not variants_ready(upload_folder, image_filename):
+        original = url_for('static', filename='images/products/' + (image_filename or ''))
+        return {'src': original, 'webp_srcset': None, 'jpg_srcset': None}
+
+    def srcset(ext):
+        return ', '.join(
+            f"{url_for('static', filename='images/products/' + variant_filename(image_filename, variant, ext))} {width}w"
+            for variant, width in VARIANTS.items())
+
+    return {
+        'src': url_for('static', filename='images/products/' + variant_filename(image_filename, 'thumb', 'jpg')),
+        'webp_srcset': srcset('webp'),
+        'jpg_srcset': srcset('jpg'),
+    }
+
+
+def init_images(app):
+    app.add_template_global(product_image)
@@ -0,0 +1,75 @@
+LOW_STOCK_THRESHOLD = 10
+
+
+class InsufficientStock(Exception):
+    def __init__(self, shortages):
+        # shortages maps VariationID -> units still available
+        self.shortages = shortages
+        super().__init__(f"Insufficient stock for {', '.join(shortages)}")
+
+
+def _quantity_case(quantities):
+    cases = ' '.join(['WHEN %s THEN %s'] * len(quantities))
+    params = [value for item in quantities.items() for value in item]
+    return f"CASE VariationID {cases} END", params
+
+
+def _status_case(new_quantity_sql):
+    # Status is assigned before Quantity, so it reads the pre-update value on
+    # MySQL (left-to-right SET) and on SQLite alike
+    return f"""CASE
+            WHEN {new_quantity_sql} <= 0 THEN 'restock'
+            WHEN {new_quantity_sql} < {LOW_STOCK_THRESHOLD} THEN 'low-stock'
+            ELSE 'in-stock'
+        END"""
+
+
+def reserve_stock(cursor, quantities):
+    """Take {VariationID: units} out of stock with one conditional UPDATE.
+
+    A line only changes when enough stock is left, so concurrent checkouts
+    can never oversell. If any line falls short nothing is taken and
+    InsufficientStock reports what is left of each short line.
+    """
+    quantities = {variation_id: int(qty) for variation_id, qty in quantities.items() if int(qty) > 0}
+    if not quantities:
+        return
+
+    delta_sql, delta_params = _quantity_case(quantities)
+    in_list = ', '.join(['%s'] * len(quantities))
+    cursor.execute("SAVEPOINT reserve_stock")
+    cursor.execute(f"""
+        UPDATE product_variation
+        SET Status = {_status_case(f'Quantity - {delta_sql}')},
+            Quantity = Quantity - {delta_sql}
+        WHERE VariationID IN ({in_list}) AND Quantity >= {delta_sql}
+    """, (*delta_params, *delta_params, *delta_params, *quantities.keys(), *delta_params))
+
+    if cursor.rowcount == len(quantities):
+        return
+
+    # undo the lines that did fit so the remaining quantities read as before
+    cursor.execute("ROLLBACK TO SAVEPOINT reserve_stock")
+    cursor.execute(f"SELECT VariationID, Quantity FROM product_variation WHERE VariationID IN ({in_list}) FOR UPDATE",
+                   tuple(quantities.keys()))
+    available = {row[0]: row[1] for row in cursor.fetchall()}
+    shortages = {variation_id: available.get(variation_id, 0)
+                 for variation_id, qty in quantities.items()
+                 if available.get(variation_id, 0) < qty}
+    raise InsufficientStock(shortages)
+
+
+def release_stock(cursor, quantities):
+    """Put {VariationID: units} back into stock, e.g. when an order is cancelled."""
+    quantities = {variation_id: int(qty) for variation_id, qty in quantities.items() if int(qty) > 0}
+    if not quantities:
+        return
+
+    delta_sql, delta_params = _quantity_case(quantities)
+    in_list = ', '.join(['%s'] * len(quantities))
+    cursor.execute(f"""
+        UPDATE product_variation
+        SET Status = {_status_case(f'Quantity + {delta_sql}')},
+            Quantity = Quantity + {delta_sql}
+        WHERE VariationID IN ({in_list})
+    """, (*delta_params, *delta_params, *delta_params, *quantities.keys()))
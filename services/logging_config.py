@@ -0,0 +1,78 @@
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+# Share of per-row debug messages (logged with extra=SAMPLED) that are kept
+LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", 0.01))
+# Records waiting for the writer thread; more than this are dropped, never waited on
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", 10000))
+LOG_FORMAT = "%(asctime)s %(levelname)s %(name)s [%(process)d] %(message)s"
+
+# pass as extra= on messages logged once per row, product or loop iteration
+SAMPLED = {'sampled': True}
+
+_listener = None
+
+
+class SampleFilter(logging.Filter):
+    def filter(self, record):
+        if getattr(record, 'sampled', False):
+            return random.random() < LOG_SAMPLE_RATE
+        return True
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            pass
+
+
+def _start_listener(log_queue):
+    global _listener
+    stream = logging.StreamHandler(sys.stderr)
+    stream.setFormatter(logging.Formatter(LOG_FORMAT))
+    _listener = logging.handlers.QueueListener(log_queue, stream, respect_handler_level=True)
+    _listener.start()
+
+
+def configure_logging():
+    """Send every logger's records through a bounded queue to one writer thread.
+
+    Request threads only put records on the queue; formatting and the write
+    to stderr happen in the listener thread, so a slow stdout never stalls a
+    request. The listener is restarted in each forked gunicorn worker.
+    """
+    if _listener is not None:
+        return
+
+    log_queue = queue.Queue(LOG_QUEUE_SIZE)
+    handler = NonBlockingQueueHandler(log_queue)
+    handler.addFilter(SampleFilter())
+
+    root = logging.getLogger()
+    root.handlers = [handler]
+    root.setLevel(LOG_LEVEL)
+
+    _start_listener(log_queue)
+    atexit.register(_stop_listener)
+    if hasattr(os, 'register_at_fork'):
+        # the writer thread doesn't survive a fork; the child gets an empty queue and its own thread
+        os.register_at_fork(after_in_child=lambda: _restart_after_fork(handler))
+
+
+def _restart_after_fork(handler):
+    handler.queue = queue.Queue(LOG_QUEUE_SIZE)
+    _start_listener(handler.queue)
+
+
+def _stop_listener():
+    # write out whatever is still queued before the process exits
+    if _listener is not None:
+        _listener.stop()
@@ -0,0 +1,48 @@
+from datetime import datetime
+
+TOP_LIMIT = 5
+
+
+def refresh_market_top_products(cursor):
+    """Recompute the marketplace-wide best sellers into market_top_products.
+
+    This is the one global GROUP BY over seller_variation_sales; it runs in
+    scripts/refresh_market_stats.py (e.g. from cron), never in a request.
+    The caller commits.
+    """
+    cursor.execute("""
+        SELECT p.Product_Name, pv.Unit, SUM(svs.Units) AS total_sold
+        FROM seller_variation_sales svs
+        JOIN product_variation pv ON svs.VariationID = pv.VariationID
+        JOIN product p ON pv.ProductID = p.ProductID
+        GROUP BY p.Product_Name, pv.Unit
+        ORDER BY total_sold DESC
+        LIMIT %s
+    """, (TOP_LIMIT,))
+    rows = cursor.fetchall()
+
+    refreshed_at = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    cursor.execute("DELETE FROM market_top_products")
+    if rows:
+        cursor.executemany("""
+            INSERT INTO market_top_products (Rank_No, Product_Name, Unit, Total_Sold, Refreshed_At)
+            VALUES (%s, %s, %s, %s, %s)
+        """, [(rank, name, unit, total_sold, refreshed_at)
+              for rank, (name, unit, total_sold) in enumerate(rows, start=1)])
+    return len(rows)
+
+
+def get_market_top_products(cursor):
+    """Return (top products, refreshed_at) as last stored by the refresh job.
+
+    Both are empty / None until the job has run once.
+    """
+    cursor.execute("""
+        SELECT Product_Name, Unit, Total_Sold AS total_sold, Refreshed_At
+        FROM market_top_products
+        ORDER BY Rank_No
+    """)
+    rows = cursor.fetchall()
+    refreshed_at = rows[0]['Refreshed_At'] if rows else None
+    return [{'Product_Name': row['Product_Name'], 'Unit': row['Unit'], 'total_sold': row['total_sold']}
+            for row in rows], refreshed_at
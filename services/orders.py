@@ -0,0 +1,166 @@
+from database.db import get_db_connection
+from services.catalog import refresh_summary_stock
+from services.inventory import release_stock
+from services.pagination import DEFAULT_PAGE_SIZE, TEXT, encode_cursor
+from services.sales import record_sale
+
+
+def cancel_order(order_id, from_status, buyer_id=None, seller_id=None):
+    """Cancel an order still in from_status and put its units back in stock.
+
+    The status check and the restock happen in one transaction, so a double
+    submit or a buyer and seller cancelling at once restocks only once.
+    Returns False when the order was not in from_status (or not owned).
+    """
+    if buyer_id is not None:
+        table, owner_column, owner_id = 'buyer_order', 'BuyerID', buyer_id
+    else:
+        table, owner_column, owner_id = 'seller_order', 'SellerID', seller_id
+
+    connection = get_db_connection()
+    cursor = connection.cursor()
+    try:
+        cursor.execute(f"""
+            SELECT ProductID, VariationID, Quantity
+            FROM {table}
+            WHERE OrderID = %s AND {owner_column} = %s AND Order_Status = %s
+            FOR UPDATE
+        """, (order_id, owner_id, from_status))
+        order = cursor.fetchone()
+        if not order:
+            connection.rollback()
+            return False
+
+        product_id, variation_id, quantity = order
+        cursor.execute("UPDATE buyer_order SET Order_Status = 'cancelled' WHERE OrderID = %s", (order_id,))
+        cursor.execute("UPDATE seller_order SET Order_Status = 'cancelled' WHERE OrderID = %s", (order_id,))
+        release_stock(cursor, {variation_id: quantity})
+        refresh_summary_stock(cursor, [product_id])
+
+        connection.commit()
+        return True
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
+        cursor.close()
+        connection.close()
+
+
+def mark_order_delivered(order_id, buyer_id):
+    """Move a buyer's shipping order to delivered and count it in the seller's sales.
+
+    Like cancel_order, only an order still in 'shipping' changes, so a double
+    submit is not counted twice. Returns False when nothing changed.
+    """
+    connection = get_db_connection()
+    cursor = connection.cursor()
+    try:
+        cursor.execute("""
+            SELECT so.SellerID, so.VariationID, DATE(so.Order_Date), so.Quantity, so.Unit_Price
+            FROM buyer_order bo
+            JOIN seller_order so ON so.OrderID = bo.OrderID
+            WHERE bo.OrderID = %s AND bo.BuyerID = %s AND bo.Order_Status = 'shipping'
+            FOR UPDATE
+        """, (order_id, buyer_id))
+        order = cursor.fetchone()
+        if not order:
+            connection.rollback()
+            return False
+
+        cursor.execute("UPDATE buyer_order SET Order_Status = 'delivered' WHERE OrderID = %s", (order_id,))
+        cursor.execute("UPDATE seller_order SET Order_Status = 'delivered' WHERE OrderID = %s", (order_id,))
+        record_sale(cursor, *order)
+
+        connection.commit()
+        return True
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
+        cursor.close()
+        connection.close()
+
+
+def format_address(row):
+    if row['Full_Name'] is None:
+        return ""
+    return f"{row['Full_Name']}, {row['Phone_Number']}, {row['Street']}, {row['Municipality']}, {row['Province']} {row['Zip_Code']}"
+
+
+def format_payment_option(row):
+    if row['Payment_Method'] is None:
+        return ""
+    return f"{row['Payment_Method']}, {row['Account_Number']}"
+
+
+# (Order_Date, OrderID) of the last order on a page
+ORDER_CURSOR = (TEXT, TEXT)
+
+
+def get_orders(status, buyer_id=None, seller_id=None, sort='recent', after=None, limit=DEFAULT_PAGE_SIZE):
+    """Load one page of a buyer's or seller's orders in a status tab.
+
+    Product, variation, delivery address and payment option come from a
+    single joined query instead of four lookups per order. Pages are keyed
+    on (Order_Date, OrderID) so later pages cost the same as the first:
+    pass the decoded next_cursor of one page as after to get the next
+    (check it with cursor_matches(after, *ORDER_CURSOR) first).
+    Returns (orders, next_cursor), next_cursor being None on the last page.
+    """
+    if buyer_id is not None:
+        table, owner_column, owner_id = 'buyer_order', 'BuyerID', buyer_id
+    else:
+        table, owner_column, owner_id = 'seller_order', 'SellerID', seller_id
+
+    order_by = 'ASC' if sort == 'old' else 'DESC'
+    params = [owner_id, status]
+    keyset = ''
+    if after:
+        compare = '>' if sort == 'old' else '<'
+        keyset = f"AND (o.Order_Date {compare} %s OR (o.Order_Date = %s AND o.OrderID {compare} %s))"
+        params += [after[0], after[0], after[1]]
+
+    connection = get_db_connection()
+    cursor = connection.cursor(dictionary=True)
+    try:
+        cursor.execute(f"""
+            SELECT o.OrderID, o.Quantity, o.Total_Amount, o.Order_Date, o.Shipping_Date,
+                   p.Product_Name, p.ImageFileName, p.Shipping_Fee,
+                   pv.Unit, pv.Price,
+                   ba.Full_Name, ba.Phone_Number, ba.Street, ba.Municipality, ba.Province, ba.Zip_Code,
+                   bpo.Payment_Method, bpo.Account_Number
+            FROM {table} o
+            JOIN product p ON p.ProductID = o.ProductID
+            JOIN product_variation pv ON pv.VariationID = o.VariationID
+            LEFT JOIN buyer_addresses ba ON ba.AddressID = o.AddressID
+            LEFT JOIN buyer_payment_options bpo ON bpo.Payment_OptionsID = o.Payment_OptionsID
+            WHERE o.{owner_column} = %s AND o.Order_Status = %s {keyset}
+            ORDER BY o.Order_Date {order_by}, o.OrderID {order_by}
+            LIMIT %s
+        """, (*params, limit + 1))
+        rows = cursor.fetchall()
+    finally:
+        cursor.close()
+        connection.close()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1]['Order_Date'], rows[-1]['OrderID'])
+
+    orders = [{
+        'OrderID': row['OrderID'],
+        'ImageFileName': row['ImageFileName'],
+        'Product_Name': row['Product_Name'],
+        'Shipping_Fee': row['Shipping_Fee'],
+        'Unit': row['Unit'],
+        'Price': row['Price'],
+        'Quantity': row['Quantity'],
+        'Total_Amount': row['Total_Amount'],
+        'Order_Date': row['Order_Date'],
+        'Shipping_Date': row['Shipping_Date'],
+        'Buyer_Address': format_address(row),
+        'Payment_Option': format_payment_option(row)
+    } for row in rows]
+    return orders, next_cursor
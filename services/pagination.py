@@ -0,0 +1,41 @@
+import base64
+import json
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+# cursor value types, for cursor_matches()
+NUMBER = (int, float)
+TEXT = str
+
+
+def encode_cursor(*values):
+    # opaque token for the sort key of the last row on a page
+    payload = json.dumps(values, default=str, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    # returns None for a missing or tampered token
+    if not token:
+        return None
+    try:
+        payload = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        values = json.loads(payload)
+    except (ValueError, TypeError):
+        return None
+    return values if isinstance(values, list) else None
+
+
+def cursor_matches(values, *types):
+    # a cursor from another endpoint or sort order has a different shape
+    if values is None or len(values) != len(types):
+        return False
+    return all(isinstance(value, kind) and not isinstance(value, bool) for value, kind in zip(values, types))
+
+
+def get_page_size(value, default=DEFAULT_PAGE_SIZE):
+    try:
+        size = int(value)
+    except (TypeError, ValueError):
+        return default
+    return max(1, min(size, MAX_PAGE_SIZE))
@@ -0,0 +1,63 @@
+from database.db import get_db_connection
+import os
+import threading
+import time
+
+# Seconds product categories and payment methods are served from memory
+REFERENCE_CACHE_TTL = float(os.getenv("REFERENCE_CACHE_TTL", 300))
+
+_cache = {}  # name -> (expires_at, rows)
+_lock = threading.Lock()
+
+
+def _load(name, query, dictionary):
+    now = time.monotonic()
+    with _lock:
+        entry = _cache.get(name)
+        if entry and entry[0] > now:
+            return entry[1]
+
+        conn = get_db_connection()
+        cursor = conn.cursor(dictionary=dictionary)
+        try:
+            cursor.execute(query)
+            rows = cursor.fetchall()
+        finally:
+            cursor.close()
+            conn.close()
+        _cache[name] = (now + REFERENCE_CACHE_TTL, rows)
+        return rows
+
+
+def get_categories():
+    """Return product categories as [{'CategoryID', 'Category_Name'}]."""
+    return _load('categories', "SELECT CategoryID, Category_Name FROM product_category ORDER BY CategoryID", True)
+
+
+def get_category_id(category_name):
+    for category in get_categories():
+        if category['Category_Name'] == category_name:
+            return category['CategoryID']
+    return None
+
+
+def get_category_name(category_id):
+    for category in get_categories():
+        if str(category['CategoryID']) == str(category_id):
+            return category['Category_Name']
+    return None
+
+
+def get_payment_methods():
+    # rows of methods_of_payment as plain tuples, the shape the payment option pages index into
+    return _load('payment_methods', "SELECT * FROM methods_of_payment", False)
+
+
+def invalidate_reference_data(name=None):
+    # call after editing product_category or methods_of_payment; only this process is cleared,
+    # other workers catch up within REFERENCE_CACHE_TTL
+    with _lock:
+        if name is None:
+            _cache.clear()
+        else:
+            _cache.pop(name, None)
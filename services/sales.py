@@ -0,0 +1,19 @@
+def record_sale(cursor, seller_id, variation_id, order_day, quantity, unit_price):
+    """Add one delivered order to the seller's sales rollups, in the caller's transaction.
+
+    seller_daily_sales is keyed by the order's day and seller_variation_sales
+    by variation, so dashboard reads cost the days or variations shown rather
+    than the seller's whole order history. unit_price is the price recorded
+    at checkout, not the variation's current price.
+    """
+    revenue = quantity * unit_price
+    cursor.execute("""
+        INSERT INTO seller_daily_sales (SellerID, Sale_Date, Orders, Units, Revenue)
+        VALUES (%s, %s, 1, %s, %s)
+        ON DUPLICATE KEY UPDATE Orders = Orders + 1, Units = Units + VALUES(Units), Revenue = Revenue + VALUES(Revenue)
+    """, (seller_id, order_day, quantity, revenue))
+    cursor.execute("""
+        INSERT INTO seller_variation_sales (SellerID, VariationID, Orders, Units, Revenue)
+        VALUES (%s, %s, 1, %s, %s)
+        ON DUPLICATE KEY UPDATE Orders = Orders + 1, Units = Units + VALUES(Units), Revenue = Revenue + VALUES(Revenue)
+    """, (seller_id, variation_id, quantity, revenue))
@@ -0,0 +1,77 @@
+import re
+
+# Words of a query that are searched for; the rest are ignored
+MAX_TERMS = 8
+# Most FULLTEXT matches ranked per search, best matches first
+MAX_CANDIDATES = 1000
+# Share of the score from text relevance, nearness and price
+RELEVANCE_WEIGHT = 0.6
+DISTANCE_WEIGHT = 0.3
+PRICE_WEIGHT = 0.1
+
+
+def search_terms(query):
+    # letters and digits only, so nothing in the query acts as a boolean operator
+    return re.findall(r'\w+', (query or '').lower())[:MAX_TERMS]
+
+
+def boolean_query(terms):
+    # every word must match, each as a prefix ("tom" finds "tomatoes")
+    return ' '.join(f'+{term}*' for term in terms)
+
+
+def find_matches(cursor, terms, category_id=None, product_ids=None):
+    """Return [(ProductID, relevance, min_price)] of listed products whose name or category matches every term.
+
+    With product_ids (e.g. those in the buyer's range) only those are
+    searched, so the MAX_CANDIDATES best matches are all ones that can show.
+    """
+    query = boolean_query(terms)
+    params = [query, query]
+    filters = ""
+    if category_id:
+        filters = "AND CategoryID = %s"
+        params.append(category_id)
+    if product_ids is not None:
+        if not product_ids:
+            return []
+        filters += f" AND ProductID IN ({', '.join(['%s'] * len(product_ids))})"
+        params.extend(product_ids)
+
+    cursor.execute(f"""
+        SELECT ProductID, Min_Price,
+               MATCH(Product_Name, Category_Name) AGAINST (%s IN BOOLEAN MODE) AS Relevance
+        FROM product_summary
+        WHERE MATCH(Product_Name, Category_Name) AGAINST (%s IN BOOLEAN MODE)
+        {filters}
+        ORDER BY Relevance DESC
+        LIMIT %s
+    """, (*params, MAX_CANDIDATES))
+    return [(row['ProductID'], float(row['Relevance']), float(row['Min_Price'])) for row in cursor.fetchall()]
+
+
+def rank_matches(matches, distances=None, range_km=None):
+    """Order matches by a blend of relevance, distance and price, best first.
+
+    Returns [(score, ProductID, distance_km)]. With distances (ProductID ->
+    km) only the products in it are kept, and nearer ones score higher.
+    Relevance and price are scored against the best of this result set.
+    """
+    if distances is not None:
+        matches = [match for match in matches if match[0] in distances]
+    if not matches:
+        return []
+
+    top_relevance = max(relevance for _, relevance, _ in matches) or 1
+    lowest_price = min(price for _, _, price in matches)
+    ranked = []
+    for product_id, relevance, price in matches:
+        score = RELEVANCE_WEIGHT * relevance / top_relevance
+        score += PRICE_WEIGHT * (lowest_price / price if price > 0 else 1)
+        distance = None
+        if distances is not None:
+            distance = distances[product_id]
+            score += DISTANCE_WEIGHT * (1 - distance / range_km if range_km else 1)
+        ranked.append((round(score, 6), product_id, distance))
+    ranked.sort(key=lambda item: (-item[0], item[1]))
+    return ranked
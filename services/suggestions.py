@@ -0,0 +1,227 @@
+from collections import deque
+from database.db import get_db_connection
+from services.catalog_changes import ChangeFollower, read_high_water_mark
+from services.reference import get_categories
+import logging
+import os
+import re
+import threading
+import time
+
+# Seconds between checks of catalog_change for products renamed or removed by other workers
+POLL_INTERVAL = float(os.getenv("SUGGEST_POLL_SECONDS", 5))
+SUGGEST_LIMIT = 8
+MAX_PREFIX_LENGTH = 64
+
+logger = logging.getLogger(__name__)
+
+
+def normalize(text):
+    return ' '.join(re.findall(r'\w+', (text or '').lower()))
+
+
+class _Node:
+    __slots__ = ('children', 'entries', 'top')
+
+    def __init__(self):
+        self.children = {}
+        self.entries = {}  # (kind, name) -> number of products with that name
+        self.top = None    # cached completions, cleared when a name below changes
+
+
+class PrefixTrie:
+    """Names keyed by each of their words, so "tom" completes "Cherry Tomatoes"."""
+
+    def __init__(self):
+        self.root = _Node()
+
+    def add(self, kind, name):
+        for key in self._keys(name):
+            node = self.root
+            node.top = None
+            for char in key:
+                node = node.children.setdefault(char, _Node())
+                node.top = None
+            node.entries[(kind, name)] = node.entries.get((kind, name), 0) + 1
+
+    def remove(self, kind, name):
+        for key in self._keys(name):
+            path = [self.root]
+            for char in key:
+                node = path[-1].children.get(char)
+                if node is None:
+                    break
+                path.append(node)
+            else:
+                for node in path:
+                    node.top = None
+                node = path[-1]
+                count = node.entries.get((kind, name), 0)
+                if count > 1:
+                    node.entries[(kind, name)] = count - 1
+                else:
+                    node.entries.pop((kind, name), None)
+                # prune the branch back to the last node still in use
+                for depth in range(len(key), 0, -1):
+                    node = path[depth]
+                    if node.children or node.entries:
+                        break
+                    del path[depth - 1].children[key[depth - 1]]
+
+    def complete(self, prefix, limit=SUGGEST_LIMIT):
+        """Up to limit (kind, name) whose words start with prefix, shortest completions first."""
+        node = self.root
+        for char in prefix:
+            node = node.children.get(char)
+            if node is None:
+                return []
+        if limit > SUGGEST_LIMIT:
+            return self._collect(node, limit)
+        if node.top is None:
+            node.top = self._collect(node, SUGGEST_LIMIT)
+        return node.top[:limit]
+
+    def _collect(self, node, limit):
+        found = []
+        queue = deque([node])
+        while queue and len(found) < limit:
+            node = queue.popleft()
+            for entry, _ in sorted(node.entries.items(), key=lambda item: (-item[1], item[0][1])):
+                if entry not in found:
+                    found.append(entry)
+            queue.extend(node.children[char] for char in sorted(node.children))
+        return found[:limit]
+
+    def _keys(self, name):
+        words = normalize(name).split()
+        return {' '.join(words[index:]) for index in range(len(words))}
+
+
+class SuggestionIndex:
+    """Product and category names for typeahead, kept in memory by each worker.
+
+    A background thread loads the names and then follows catalog_change for
+    products changed by other workers; the seller views refresh their own
+    worker's copy right after committing. Lookups never query the database.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pid = None
+        self._changes = ChangeFollower(('product',))
+        self.trie = PrefixTrie()
+        self.product_names = {}     # ProductID -> Product_Name
+        self.category_names = set()
+
+    def start(self):
+        # threads don't survive gunicorn's fork, so each worker starts its own
+        pid = os.getpid()
+        if self._pid == pid:
+            return
+        with self._lock:
+            if self._pid != pid:
+                self._pid = pid
+                threading.Thread(target=self._refresh_loop, name='suggestions', daemon=True).start()
+
+    def suggest(self, prefix, limit=SUGGEST_LIMIT):
+        self.start()
+        prefix = normalize(prefix)[:MAX_PREFIX_LENGTH]
+        if not prefix:
+            return []
+        with self._lock:
+            entries = self.trie.complete(prefix, limit)
+        return [{'text': name, 'type': kind} for kind, name in entries]
+
+    def refresh_products(self, cursor, product_ids):
+        """Re-read the names of product_ids from product_summary; unlisted products are dropped."""
+        product_ids = set(product_ids)
+        if not product_ids:
+            return
+        placeholders = ', '.join(['%s'] * len(product_ids))
+        cursor.execute(f"SELECT ProductID, Product_Name FROM product_summary WHERE ProductID IN ({placeholders})",
+                       tuple(product_ids))
+        found = {row[0]: row[1] for row in cursor.fetchall()}
+        with self._lock:
+            for product_id in product_ids:
+                if product_id in found:
+                    self._put_product(product_id, found[product_id])
+                else:
+                    self._drop_product(product_id)
+
+    def _refresh_loop(self):
+        loaded = False
+        while True:
+            try:
+                if loaded:
+                    self._apply_changes()
+                else:
+                    self._load_all()
+                    loaded = True
+                self._sync_categories()
+            except Exception as err:
+                logger.error("Suggestion index refresh failed: %s", err)
+            time.sleep(POLL_INTERVAL)
+
+    def _load_all(self):
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        try:
+            last_change_id = read_high_water_mark(cursor)
+            cursor.execute("SELECT ProductID, Product_Name FROM product_summary")
+            products = cursor.fetchall()
+        finally:
+            cursor.close()
+            conn.close()
+
+        trie = PrefixTrie()
+        for _, product_name in products:
+            trie.add('product', product_name)
+        with self._lock:
+            self.trie, self.product_names, self.category_names = trie, dict(products), set()
+            self._changes.reset(last_change_id)
+
+    def _apply_changes(self):
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        try:
+            changes = self._changes.fetch(cursor)
+            if changes is None:
+                self._load_all()
+                return
+            self.refresh_products(cursor, ChangeFollower.entity_ids(changes, 'product'))
+        finally:
+            cursor.close()
+            conn.close()
+        self._changes.advance(changes)
+
+    def _sync_categories(self):
+        # get_categories() is the per-process reference cache, so this rarely queries
+        names = {category['Category_Name'] for category in get_categories()}
+        with self._lock:
+            for name in self.category_names - names:
+                self.trie.remove('category', name)
+            for name in names - self.category_names:
+                self.trie.add('category', name)
+            self.category_names = names
+
+    def _put_product(self, product_id, product_name):
+        if self.product_names.get(product_id) == product_name:
+            return
+        self._drop_product(product_id)
+        self.product_names[product_id] = product_name
+        self.trie.add('product', product_name)
+
+    def _drop_product(self, product_id):
+        product_name = self.product_names.pop(product_id, None)
+        if product_name is not None:
+            self.trie.remove('product', product_name)
+
+
+suggestion_index = SuggestionIndex()
+
+
+def init_suggestions(app):
+    # load in the background once the process serves its first request, rather
+    # than on the first keystroke. Not at import: image worker processes
+    # (spawned, so they re-import app.py) must not start a polling thread.
+    app.before_request(suggestion_index.start)
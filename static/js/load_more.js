@@ -0,0 +1,27 @@
+// "Load more" buttons fetch the next page of cards as rendered HTML and
+// append it to data-target, following the cursor the server returns.
+document.addEventListener("DOMContentLoaded", () => {
+  document.querySelectorAll(".load-more").forEach((button) => {
+    button.addEventListener("click", () => {
+      const target = document.querySelector(button.dataset.target);
+      const url = new URL(button.dataset.url, window.location.origin);
+      url.searchParams.set("after", button.dataset.cursor);
+
+      button.disabled = true;
+      fetch(url)
+        .then((response) => response.json())
+        .then((data) => {
+          target.insertAdjacentHTML("beforeend", data.html);
+          if (data.next_cursor) {
+            button.dataset.cursor = data.next_cursor;
+            button.disabled = false;
+          } else {
+            button.remove();
+          }
+        })
+        .catch(() => {
+          button.disabled = false;
+        });
+    });
+  });
+});
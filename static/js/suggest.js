@@ -0,0 +1,32 @@
+// Search boxes with data-suggest-url fill their datalist from /suggest as
+// the buyer types, keeping only the answer to the latest keystroke.
+document.addEventListener("DOMContentLoaded", () => {
+  document.querySelectorAll("input[data-suggest-url]").forEach((input) => {
+    const list = document.getElementById(input.getAttribute("list"));
+    let latest = 0;
+
+    input.addEventListener("input", () => {
+      const query = input.value.trim();
+      const request = ++latest;
+      if (!query) {
+        list.innerHTML = "";
+        return;
+      }
+
+      const url = new URL(input.dataset.suggestUrl, window.location.origin);
+      url.searchParams.set("q", query);
+      fetch(url)
+        .then((response) => response.json())
+        .then((data) => {
+          if (request !== latest) return;
+          list.innerHTML = "";
+          (data.suggestions || []).forEach((suggestion) => {
+            const option = document.createElement("option");
+            option.value = suggestion.text;
+            list.appendChild(option);
+          });
+        })
+        .catch(() => {});
+    });
+  });
+});